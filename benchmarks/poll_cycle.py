@@ -0,0 +1,227 @@
+"""Benchmarks the controller's poll cycle against simulated MK3 interfaces.
+
+Run it from the root of the repository in an environment where Home Assistant and
+the victron_mk3 library are installed:
+
+    python -m benchmarks.poll_cycle --cycles 200 --entries 4
+
+It reports the following:
+
+- poll cycle latency percentiles
+- frames per second
+- CPU time per cycle
+- remote panel command latency
+- how long the event loop was blocked
+- with --adaptive, the update intervals chosen by adaptive polling and the share of
+  updates that counted as activity, so that the back-off can be checked against the
+  simulated power noise
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+from datetime import timedelta
+import statistics
+import time
+from typing import List
+
+from custom_components.victron_mk3 import (
+    DEFAULT_SUBSCRIPTIONS,
+    Controller,
+    Mode,
+    Section,
+    adaptive_interval,
+)
+from custom_components.victron_mk3.const import (
+    DEFAULT_ACTIVITY_THRESHOLD,
+    DEFAULT_MAX_UPDATE_INTERVAL,
+    DEFAULT_MIN_UPDATE_INTERVAL,
+)
+
+from .simulator import SimulatedMK3
+
+# Interval at which the event loop monitor wakes up to measure loop lag.
+MONITOR_INTERVAL = 0.005
+
+
+@dataclass
+class EntryResult:
+    cycles: List[float] = field(default_factory=list)
+    commands: List[float] = field(default_factory=list)
+    intervals: List[float] = field(default_factory=list)
+    active: int = 0
+    frames: int = 0
+
+
+def percentiles(samples: List[float]) -> str:
+    if len(samples) < 2:
+        return "n/a"
+    q = statistics.quantiles(samples, n=100, method="inclusive")
+    return (
+        f"p50={q[49] * 1000:.1f}ms p90={q[89] * 1000:.1f}ms "
+        f"p99={q[98] * 1000:.1f}ms max={max(samples) * 1000:.1f}ms"
+    )
+
+
+async def monitor_loop(lags: List[float]) -> None:
+    while True:
+        expected = time.perf_counter() + MONITOR_INTERVAL
+        await asyncio.sleep(MONITOR_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def run_entry(index: int, args: argparse.Namespace) -> EntryResult:
+    simulator: SimulatedMK3 | None = None
+
+    def make_simulator(port: str) -> SimulatedMK3:
+        nonlocal simulator
+        simulator = SimulatedMK3(
+            port,
+            latency=args.latency,
+            jitter=args.jitter,
+            wire_time=args.wire_time,
+            phases=args.phases,
+            seed=index,
+        )
+        return simulator
+
+    controller = Controller(
+        f"/dev/simulated{index}",
+        activity_threshold=args.activity_threshold,
+        adaptive=args.adaptive,
+        sample_rate=args.sample_rate,
+        io_thread=args.io_thread,
+        mk3_factory=make_simulator,
+    )
+    # There are no entities so set up the phases and subscribe to them directly.
+    controller.ac_phases = list(range(1, args.phases + 1))
+    controller.subscribed = DEFAULT_SUBSCRIPTIONS | {
+        Section.ac(x) for x in controller.ac_phases
+    }
+
+    result = EntryResult()
+    commands: List[asyncio.Task] = []
+    minimum = timedelta(seconds=args.min_interval)
+    maximum = timedelta(seconds=args.max_interval)
+    interval = minimum
+
+    async def command() -> None:
+        started = time.perf_counter()
+        await controller.set_remote_panel_state(Mode.ON, 16.0)
+        result.commands.append(time.perf_counter() - started)
+
+    await controller.start()
+    try:
+        for cycle in range(args.cycles):
+            if args.command_every and cycle % args.command_every == 0:
+                commands.append(asyncio.create_task(command()))
+            started = time.perf_counter()
+            await controller.update()
+            result.cycles.append(time.perf_counter() - started)
+            if args.adaptive:
+                result.active += controller.active
+                interval = adaptive_interval(
+                    interval, controller.active, minimum, maximum
+                )
+                result.intervals.append(interval.total_seconds())
+                await asyncio.sleep(interval.total_seconds())
+            elif args.interval:
+                await asyncio.sleep(args.interval)
+        await asyncio.gather(*commands)
+    finally:
+        await controller.stop()
+    result.frames = simulator.frames
+    return result
+
+
+async def run(args: argparse.Namespace) -> None:
+    lags: List[float] = []
+    monitor = asyncio.create_task(monitor_loop(lags))
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run_entry(x, args) for x in range(args.entries)))
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    monitor.cancel()
+
+    cycles = [x for result in results for x in result.cycles]
+    commands = [x for result in results for x in result.commands]
+    frames = sum(x.frames for x in results)
+    print(f"entries:         {args.entries}")
+    print(f"cycles:          {len(cycles)} in {elapsed:.2f}s")
+    print(f"cycle latency:   {percentiles(cycles)}")
+    print(f"command latency: {percentiles(commands)}")
+    print(f"frames/s:        {frames / elapsed:.1f}")
+    print(f"CPU per cycle:   {cpu / len(cycles) * 1000:.3f}ms")
+    print(f"loop lag:        {percentiles(lags)}")
+    if args.adaptive:
+        intervals = [x for result in results for x in result.intervals]
+        active = sum(x.active for x in results)
+        print(f"update interval: {percentiles(intervals)}")
+        print(f"active updates:  {active / len(cycles):.0%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=100, help="poll cycles per entry")
+    parser.add_argument(
+        "--entries", type=int, default=1, help="config entries to run at once"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="device turnaround in seconds"
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.005,
+        help="standard deviation of the turnaround",
+    )
+    parser.add_argument(
+        "--wire-time", type=float, default=0.01, help="serial time per frame in seconds"
+    )
+    parser.add_argument("--phases", type=int, default=1, help="AC phases that respond")
+    parser.add_argument(
+        "--interval", type=float, default=0.0, help="delay between cycles in seconds"
+    )
+    parser.add_argument(
+        "--sample-rate", type=float, default=0.0, help="sampler rate in Hz"
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="wait the adaptive update interval between cycles instead of --interval",
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=DEFAULT_MIN_UPDATE_INTERVAL,
+        help="adaptive update interval while active in seconds",
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=DEFAULT_MAX_UPDATE_INTERVAL,
+        help="adaptive update interval while steady in seconds",
+    )
+    parser.add_argument(
+        "--activity-threshold",
+        type=float,
+        default=DEFAULT_ACTIVITY_THRESHOLD,
+        help="power departure in watts that counts as activity",
+    )
+    parser.add_argument(
+        "--io-thread", action="store_true", help="run each simulator on its own thread"
+    )
+    parser.add_argument(
+        "--command-every",
+        type=int,
+        default=0,
+        help="send a remote panel command every N cycles",
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Replays a capture file through the controller and measures the response path.
+
+Run it from the root of the repository in an environment where Home Assistant and
+the victron_mk3 library are installed:
+
+    python -m benchmarks.replay /path/to/victron_mk3.cap --speed 0
+
+The capture is decoded by the real VictronMK3 so every response travels the same path
+it does at a site: frame decoding, the handler, the snapshot, and the push listeners.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from custom_components.victron_mk3 import Controller, Section
+from custom_components.victron_mk3.transports import replay_url
+
+from .poll_cycle import percentiles
+
+
+async def run(args: argparse.Namespace) -> None:
+    controller = Controller(replay_url(args.capture, speed=args.speed))
+    stored = 0
+
+    def on_stored() -> None:
+        nonlocal stored
+        stored += 1
+
+    for section in Section:
+        controller.async_add_listener(section, on_stored)
+
+    cycles: list[float] = []
+    failures = 0
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    await controller.start()
+    try:
+        for _ in range(args.cycles):
+            cycle_started = time.perf_counter()
+            try:
+                await controller.update()
+            except UpdateFailed:
+                failures += 1
+                await asyncio.sleep(args.interval)
+                continue
+            cycles.append(time.perf_counter() - cycle_started)
+            if args.interval:
+                await asyncio.sleep(args.interval)
+    finally:
+        await controller.stop()
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+
+    print(f"cycles:          {len(cycles)} ok, {failures} failed in {elapsed:.2f}s")
+    print(f"cycle latency:   {percentiles(cycles)}")
+    print(f"responses/s:     {stored / elapsed:.1f}")
+    print(f"CPU per response: {cpu / max(stored, 1) * 1000:.3f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="path of the capture file")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=0.0,
+        help="multiple of the recorded pace, or 0 to answer each request at once",
+    )
+    parser.add_argument("--cycles", type=int, default=100, help="poll cycles to run")
+    parser.add_argument(
+        "--interval", type=float, default=0.0, help="delay between cycles in seconds"
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
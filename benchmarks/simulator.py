@@ -0,0 +1,156 @@
+"""A simulated MK3 interface for benchmarking the integration without hardware.
+
+The simulator stands in for victron_mk3.VictronMK3. It answers each request with a
+response of the expected type after a configurable delay, and it delivers a version
+response every second like the real interface.
+
+Each frame first holds the serial link for the wire time, then takes the device's
+turnaround latency. The controller waits for each response before it sends the next
+request, so the simulator doesn't model several outstanding requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from victron_mk3 import (
+    ACResponse,
+    ConfigResponse,
+    DCResponse,
+    DeviceState,
+    Handler,
+    LEDResponse,
+    PowerResponse,
+    Response,
+    VersionResponse,
+)
+
+VERSION_INTERVAL = 1.0
+
+_simulated_types: dict[type, type] = {}
+
+
+def make_response(response_type: type, **fields) -> Response:
+    """Makes a response of the given type without decoding a frame.
+
+    The response is an instance of a subclass that does not log itself because the
+    simulated responses only carry the fields that the integration reads.
+    """
+    simulated_type = _simulated_types.get(response_type)
+    if simulated_type is None:
+        simulated_type = type(
+            f"Simulated{response_type.__name__}",
+            (response_type,),
+            {"log": lambda self, logger, level: None},
+        )
+        _simulated_types[response_type] = simulated_type
+    response = simulated_type.__new__(simulated_type)
+    response.__dict__.update(fields)
+    return response
+
+
+class SimulatedMK3:
+    def __init__(
+        self,
+        port: str,
+        latency: float = 0.02,
+        jitter: float = 0.005,
+        wire_time: float = 0.01,
+        phases: int = 1,
+        seed: int | None = None,
+    ) -> None:
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.wire_time = wire_time
+        self.phases = phases
+        self.frames = 0
+        self._random = random.Random(seed)
+        self._wire = asyncio.Lock()
+        self._handler: Handler | None = None
+        self._version_task: asyncio.Task | None = None
+
+    async def start(self, handler: Handler) -> None:
+        self._handler = handler
+        self._version_task = asyncio.create_task(self._send_versions())
+
+    async def stop(self) -> None:
+        if self._version_task is not None:
+            self._version_task.cancel()
+            self._version_task = None
+
+    async def _send_versions(self) -> None:
+        while True:
+            self._handler.on_response(make_response(VersionResponse, version=2629492))
+            await asyncio.sleep(VERSION_INTERVAL)
+
+    async def _exchange(self, response: Response | None) -> Response | None:
+        async with self._wire:
+            await asyncio.sleep(self.wire_time)
+        await asyncio.sleep(max(0.0, self._random.gauss(self.latency, self.jitter)))
+        self.frames += 1
+        if response is not None:
+            self._handler.on_response(response)
+        return response
+
+    def _noise(self, value: float, spread: float) -> float:
+        return value + self._random.uniform(-spread, spread)
+
+    async def send_interface_request(self, flags) -> None:
+        await self._exchange(None)
+
+    async def send_state_request(self, switch_state, current_limit) -> None:
+        await self._exchange(None)
+
+    async def send_led_request(self) -> LEDResponse:
+        return await self._exchange(make_response(LEDResponse, on=0, blink=0))
+
+    async def send_dc_request(self) -> DCResponse:
+        return await self._exchange(
+            make_response(
+                DCResponse,
+                dc_voltage=self._noise(26.5, 0.2),
+                dc_current_to_inverter=self._noise(10.0, 5.0),
+                dc_current_from_charger=0.0,
+                ac_inverter_frequency=self._noise(60.0, 0.05),
+            )
+        )
+
+    async def send_ac_request(self, phase: int) -> ACResponse | None:
+        if phase > self.phases:
+            # Absent phases don't answer so the request costs a timeout's worth of time.
+            await asyncio.sleep(self.latency * 10)
+            return None
+        return await self._exchange(
+            make_response(
+                ACResponse,
+                ac_mains_voltage=self._noise(120.0, 1.0),
+                ac_mains_current=self._noise(5.0, 1.0),
+                ac_inverter_voltage=self._noise(120.0, 1.0),
+                ac_inverter_current=self._noise(5.0, 1.0),
+                ac_mains_frequency=self._noise(60.0, 0.05),
+                ac_num_phases=self.phases,
+                device_state=next(iter(DeviceState)),
+            )
+        )
+
+    async def send_power_request(self) -> PowerResponse:
+        return await self._exchange(
+            make_response(
+                PowerResponse,
+                ac_mains_power=self._noise(600.0, 50.0),
+                ac_inverter_power=self._noise(550.0, 50.0),
+                dc_power=self._noise(-250.0, 100.0),
+            )
+        )
+
+    async def send_config_request(self) -> ConfigResponse:
+        return await self._exchange(
+            make_response(
+                ConfigResponse,
+                switch_register=0,
+                actual_current_limit=16.0,
+                minimum_current_limit=2.0,
+                maximum_current_limit=50.0,
+            )
+        )
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
-from datetime import timedelta
+from abc import abstractmethod
+import asyncio
+from datetime import datetime, timedelta
 from enum import Enum
 from homeassistant.components.device_automation.exceptions import DeviceNotFound
 from homeassistant.config_entries import ConfigEntry
@@ -13,17 +15,31 @@ from homeassistant.const import (
     CONF_MODEL,
     CONF_PORT,
 )
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import (
+    Event,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers import device_registry
+from homeassistant.helpers import device_registry, entity_registry
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.entity import Entity, EntityDescription
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
+    CoordinatorEntity,
     DataUpdateCoordinator,
     UpdateFailed,
 )
 import logging
-from typing import List
+import random
+import time
+from typing import Any, Awaitable, Callable, Iterable, List, Mapping
 from victron_mk3 import (
     ACResponse,
     ConfigResponse,
@@ -43,15 +59,60 @@ from victron_mk3 import (
 import voluptuous as vol
 
 from .const import (
-    AC_PHASES_POLLED,
+    CONF_AC_PHASES,
+    CONF_ACTIVITY_THRESHOLD,
+    CONF_ADAPTIVE_POLLING,
+    CONF_CAPTURE_PATH,
     CONF_CURRENT_LIMIT,
+    CONF_FAST_POLL_INTERVAL,
+    CONF_HEARTBEAT_INTERVAL,
+    CONF_IO_THREAD,
+    CONF_MAX_AGE,
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_METRICS_ENDPOINT,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_PARTIAL_TOTALS,
+    CONF_PUSH_UPDATES,
+    CONF_SAMPLE_RATE,
     CONF_SERIAL_NUMBER,
+    CONF_SLOW_POLL_INTERVAL,
+    DEFAULT_AC_PHASES,
+    DEFAULT_ACTIVITY_THRESHOLD,
+    DEFAULT_DEADBANDS,
+    DEFAULT_FAST_POLL_INTERVAL,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_MAX_AGE,
+    DEFAULT_MAX_UPDATE_INTERVAL,
+    DEFAULT_MIN_UPDATE_INTERVAL,
+    DEFAULT_SAMPLE_RATE,
+    DEFAULT_SLOW_POLL_INTERVAL,
     DOMAIN,
     KEY_CONTEXT,
+    KEY_FLEET,
+    MAX_AC_PHASES,
+    MAX_ENERGY_GAP,
+    SAMPLE_BUFFER_CAPACITY,
+)
+from .fleet import (
+    SIGNAL_MEMBER_REMOVED,
+    SIGNAL_MEMBERS_CHANGED,
+    FleetAggregator,
+    is_fleet_entry,
 )
+from .link import LinkScheduler, Priority
+from .metrics import LinkMetrics
+from .sampling import Aggregate, RingBuffer
+from .snapshot import (
+    SAVE_INTERVAL,
+    STORAGE_VERSION,
+    decode_responses,
+    encode_responses,
+)
+from .threaded import ThreadedMK3
+from .transports import capture_url
 
-PLATFORMS: list[Platform] = ["number", "select", "sensor", "switch"]
-UPDATE_INTERVAL = timedelta(seconds=2)
+PLATFORMS: list[Platform] = ["binary_sensor", "number", "select", "sensor", "switch"]
+FLEET_PLATFORMS: list[Platform] = ["sensor"]
 
 
 class Mode(Enum):
@@ -69,6 +130,122 @@ MODE_TO_SWITCH_STATE = {
 }
 
 
+class Section(Enum):
+    """Identifies a response held by the Data snapshot."""
+
+    LED = "led"
+    DC = "dc"
+    AC_L1 = "ac_l1"
+    AC_L2 = "ac_l2"
+    AC_L3 = "ac_l3"
+    AC_L4 = "ac_l4"
+    POWER = "power"
+    CONFIG = "config"
+    VERSION = "version"
+
+    @staticmethod
+    def ac(phase: int) -> Section:
+        return Section(f"ac_l{phase}")
+
+    @property
+    def phase(self) -> int | None:
+        return int(self.value[4:]) if self.value.startswith("ac_l") else None
+
+
+class Cadence(Enum):
+    # Polled on every update
+    FAST = 0
+    # Polled once the slow poll interval has elapsed
+    SLOW = 1
+
+
+SECTION_CADENCE = {
+    Section.LED: Cadence.SLOW,
+    Section.DC: Cadence.FAST,
+    Section.AC_L1: Cadence.FAST,
+    Section.AC_L2: Cadence.FAST,
+    Section.AC_L3: Cadence.FAST,
+    Section.AC_L4: Cadence.FAST,
+    Section.POWER: Cadence.FAST,
+    Section.CONFIG: Cadence.SLOW,
+}
+
+POLL_REQUESTS: dict[Section, Callable[[VictronMK3], Awaitable[Response | None]]] = {
+    Section.LED: lambda mk3: mk3.send_led_request(),
+    Section.DC: lambda mk3: mk3.send_dc_request(),
+    Section.AC_L1: lambda mk3: mk3.send_ac_request(1),
+    Section.AC_L2: lambda mk3: mk3.send_ac_request(2),
+    Section.AC_L3: lambda mk3: mk3.send_ac_request(3),
+    Section.AC_L4: lambda mk3: mk3.send_ac_request(4),
+    Section.POWER: lambda mk3: mk3.send_power_request(),
+    Section.CONFIG: lambda mk3: mk3.send_config_request(),
+}
+
+# Sections that are polled until the subscriptions have been built from the entity
+# registry. Additional AC phases are disabled by default.
+DEFAULT_SUBSCRIPTIONS = frozenset(
+    POLL_REQUESTS.keys() - {Section.AC_L2, Section.AC_L3, Section.AC_L4}
+)
+
+# Responses that are stored in the snapshot as soon as they arrive.
+RESPONSE_SECTIONS: dict[type[Response], Section] = {
+    LEDResponse: Section.LED,
+    DCResponse: Section.DC,
+    PowerResponse: Section.POWER,
+    ConfigResponse: Section.CONFIG,
+    VersionResponse: Section.VERSION,
+}
+
+# Measurements that are buffered while sampling, keyed by the sensor that publishes
+# their aggregates.
+SAMPLED_FIELDS: dict[str, tuple[Section, str]] = {
+    "battery_voltage": (Section.DC, "dc_voltage"),
+    "battery_power": (Section.POWER, "dc_power"),
+    "ac_input_power": (Section.POWER, "ac_mains_power"),
+    "ac_output_power": (Section.POWER, "ac_inverter_power"),
+}
+
+# Energy accumulated from the power responses, keyed by the sensor that publishes it.
+# Each accumulator integrates the positive part of the power field multiplied by the sign
+# so that energy flowing in each direction is counted separately.
+ENERGY_FIELDS: dict[str, tuple[str, int]] = {
+    "ac_input_energy": ("ac_mains_power", 1),
+    "ac_output_energy": ("ac_inverter_power", 1),
+    "battery_charge_energy": ("dc_power", 1),
+    "battery_discharge_energy": ("dc_power", -1),
+}
+
+# The power fields whose changes count as device activity.
+ACTIVITY_POWER_FIELDS = ("ac_mains_power", "ac_inverter_power", "dc_power")
+# Weight of each power sample in the moving average that activity is measured from.
+ACTIVITY_SMOOTHING = 0.2
+
+# Slow responses are considered due slightly early so that jitter in the update
+# interval does not postpone them by a whole extra update.
+POLL_SLACK = 0.9
+
+# Seconds to wait after sending a remote panel command before reading back the
+# configuration. Commands that arrive in the meantime are merged into the next frame.
+COMMAND_SETTLE_TIME = 0.2
+
+# Smallest difference in amps between current limits that is worth sending.
+CURRENT_LIMIT_TOLERANCE = 0.05
+
+# Seconds for which the configuration that was read is trusted to skip a command that
+# matches it. An older configuration may have been changed from elsewhere, such as from
+# the front panel or VictronConnect, so the command is sent anyway.
+CONFIG_MATCH_MAX_AGE = 5.0
+
+# Bounds in seconds of the exponential backoff between attempts to reconnect to the
+# interface after a communication fault.
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 300.0
+
+# The snapshot store of each entry by entry ID. Kept apart from the data of the entries
+# so that a save that is still pending after an unload is made by the same store.
+_KEY_STORES = f"{DOMAIN}_stores"
+
+
 def enum_options(enum_class) -> List[str]:
     return [x.lower() for x in enum_class._member_names_]
 
@@ -91,15 +268,87 @@ SERVICE_SCHEMA = vol.Schema(
     }
 )
 
+SERVICE_DETECT_AC_PHASES = "detect_ac_phases"
+
+SERVICE_DETECT_AC_PHASES_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_DEVICE_ID): cv.string,
+    }
+)
+
+SERVICE_GET_SNAPSHOT = "get_snapshot"
+
+SERVICE_GET_SNAPSHOT_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
 
 class Data:
     def __init__(self) -> None:
-        self.ac: List[ACResponse | None] = [None] * AC_PHASES_POLLED
+        self.ac: List[ACResponse | None] = [None] * MAX_AC_PHASES
         self.config: ConfigResponse | None = None
         self.dc: DCResponse | None = None
         self.led: LEDResponse | None = None
         self.power: PowerResponse | None = None
         self.version: VersionResponse | None = None
+        # Aggregates of the samples taken since the previous update, keyed like SAMPLED_FIELDS
+        self.aggregates: dict[str, Aggregate] = {}
+        # Energy totals in kWh, keyed like ENERGY_FIELDS
+        self.energy: dict[str, float] = {x: 0.0 for x in ENERGY_FIELDS}
+        # Health of the link to the interface, updated as requests complete
+        self.metrics = LinkMetrics()
+        # The remote panel state that was commanded but has not been read back yet
+        self.pending_mode: Mode | None = None
+        self.pending_current_limit: float | None = None
+        # Whether the responses were restored from storage and have not been polled yet
+        self.stale = False
+        # Monotonic time at which each response was received
+        self.received_at: dict[Section, float] = {}
+
+    def get(self, section: Section) -> Response | None:
+        phase = section.phase
+        if phase is not None:
+            return self.ac[phase - 1]
+        return getattr(self, section.value)
+
+    def set(self, section: Section, response: Response | None) -> None:
+        phase = section.phase
+        if phase is not None:
+            self.ac[phase - 1] = response
+        else:
+            setattr(self, section.value, response)
+
+    def age(self, section: Section, now: float) -> float | None:
+        """Seconds since the response was received, or None if it wasn't received."""
+        received_at = self.received_at.get(section)
+        return None if received_at is None else now - received_at
+
+    def as_dict(self, now: float) -> dict[str, Any]:
+        """Describes the snapshot with values that can be returned by service actions."""
+        sections = {}
+        for section in Section:
+            response = self.get(section)
+            if response is None:
+                continue
+            sections[section.value] = {
+                "age": self.age(section, now),
+                **{
+                    k: enum_value(v) if isinstance(v, Enum) else v
+                    for k, v in vars(response).items()
+                    if not k.startswith("_")
+                },
+            }
+        return {
+            "stale": self.stale,
+            "front_panel_mode": enum_value(self.front_panel_mode()),
+            "remote_panel_mode": enum_value(self.remote_panel_mode()),
+            "remote_panel_current_limit": self.remote_panel_current_limit(),
+            "actual_mode": enum_value(self.actual_mode()),
+            "energy": dict(self.energy),
+            "sections": sections,
+        }
 
     def front_panel_mode(self) -> Mode | None:
         if self.config is None:
@@ -112,6 +361,14 @@ class Data:
         return Mode.OFF
 
     def remote_panel_mode(self) -> Mode | None:
+        if self.config is None:
+            return None
+        if self.pending_mode is not None:
+            return self.pending_mode
+        return self.configured_remote_panel_mode()
+
+    def configured_remote_panel_mode(self) -> Mode | None:
+        """The remote panel mode that was last read back, ignoring pending commands."""
         if self.config is None:
             return None
         reg = self.config.switch_register
@@ -126,6 +383,16 @@ class Data:
             else:
                 return Mode.OFF
 
+    def remote_panel_current_limit(self) -> float | None:
+        if self.config is None:
+            return None
+        if self.pending_mode is not None:
+            # Commands without a current limit set it to the maximum.
+            if self.pending_current_limit is None:
+                return self.config.maximum_current_limit
+            return self.pending_current_limit
+        return self.config.actual_current_limit
+
     def actual_mode(self) -> Mode | None:
         if self.config is None:
             return None
@@ -143,72 +410,606 @@ class Data:
 
 
 class Controller(Handler):
-    def __init__(self, port: str) -> None:
-        self._mk3 = VictronMK3(port)
+    def __init__(
+        self,
+        port: str,
+        slow_poll_interval: float = DEFAULT_SLOW_POLL_INTERVAL,
+        activity_threshold: float = DEFAULT_ACTIVITY_THRESHOLD,
+        adaptive: bool = False,
+        sample_rate: float = DEFAULT_SAMPLE_RATE,
+        capture_path: str | None = None,
+        io_thread: bool = False,
+        mk3_factory: Callable[[str], VictronMK3] = VictronMK3,
+    ) -> None:
+        if capture_path:
+            # Record the raw traffic for offline replay through the mk3replay:// URL.
+            port = capture_url(port, capture_path)
         self._fault: Fault | None = None
         self._idle = False
-        self._version: VersionResponse | None = None
+        # The snapshot is updated in place as responses arrive so it carries forward
+        # the last value of responses that were not polled during the latest update.
+        self._data = Data()
+        self.metrics = self._data.metrics
+        # Serializes requests from the poll cycle, the sampler, and commands.
+        self._link = LinkScheduler(
+            lambda: ThreadedMK3(port, mk3_factory) if io_thread else mk3_factory(port),
+            self.metrics,
+        )
+        # Reconnects to the interface after a fault
+        self._reconnector: asyncio.Task | None = None
+        self._reconnect_now = asyncio.Event()
+        self._faulted_at: float | None = None
+        self._listeners: dict[Section, List[Callable[[], None]]] = {}
+        self._sleep_listeners: List[Callable[[], None]] = []
+        self._polled: dict[Section, float] = {}
+        self._standby_sent: bool | None = None
+        self._activity = False
+        self._sampler: asyncio.Task | None = None
+        self._sampled_at = time.monotonic()
+        self._energy_sample: tuple[float, PowerResponse] | None = None
+        self._buffers = (
+            {x: RingBuffer(SAMPLE_BUFFER_CAPACITY) for x in SAMPLED_FIELDS}
+            if sample_rate > 0
+            else {}
+        )
+        self.sample_rate = sample_rate
+        self.slow_poll_interval = slow_poll_interval
+        # Power departing from its moving average by this many watts counts as device
+        # activity.
+        self.activity_threshold = activity_threshold
+        self._power_baseline: dict[str, float] = {}
+        # With adaptive polling the LEDs are read on every update so that their changes
+        # count as activity without waiting for the slow poll interval.
+        self.adaptive = adaptive
+        # Whether the device state, power, or LEDs changed during the last update.
+        self.active = False
         self.standby: bool | None = None
-        self.ac_entities = [[] for _ in range(0, AC_PHASES_POLLED)]
+        # Entities that read each section and the sections read by enabled entities
+        self._subscribers: dict[Section, List[Entity]] = {}
+        self._subscribed: frozenset[Section] = DEFAULT_SUBSCRIPTIONS
+        # The AC phases that the device has
+        self.ac_phases: List[int] = list(DEFAULT_AC_PHASES)
+        # Sends the pending remote panel state and reads back the configuration
+        self._commander: asyncio.Task | None = None
+        self._command_generation = 0
 
     async def start(self) -> None:
-        await self._mk3.start(self)
+        await self._link.start(self)
+        if self.sample_rate > 0:
+            self._sampler = asyncio.create_task(self._run_sampler())
 
     async def stop(self) -> None:
-        await self._mk3.stop()
+        if self._sampler is not None:
+            self._sampler.cancel()
+            self._sampler = None
+        if self._commander is not None:
+            self._commander.cancel()
+            self._commander = None
+        if self._reconnector is not None:
+            self._reconnector.cancel()
+            self._reconnector = None
+        await self._link.stop()
 
     def on_response(self, response: Response) -> None:
         response.log(logger, logging.DEBUG)
-        self._idle = False
+        if self._idle:
+            # The first frame after the device went to sleep means that it woke up.
+            logger.info("Device woke up")
+            self._idle = False
+            self._notify_sleep()
+        if self._faulted_at is not None and self._reconnector is None:
+            self.metrics.recoveries.record(time.monotonic() - self._faulted_at)
+            self._faulted_at = None
         # We don't need to query the version because the interface delivers it every second.
-        if isinstance(response, VersionResponse):
-            self._version = response
+        # AC responses don't identify their phase so they are only stored by the poll
+        # that requested them.
+        for response_type, section in RESPONSE_SECTIONS.items():
+            if isinstance(response, response_type):
+                self._store(section, response)
+                break
 
     def on_idle(self) -> None:
         logger.debug("Idle")
+        self.metrics.idles += 1
+        # The interface keeps reporting that it is idle while the device sleeps.
+        if self._idle:
+            return
+        logger.info("Device went to sleep")
         self._idle = True
+        # The device may have lost its state while it was asleep so refresh everything.
+        self.invalidate()
+        self._data.stale = True
+        self._notify_sleep()
 
     def on_fault(self, fault: Fault) -> None:
         if fault == Fault.EXCEPTION:
             logger.exception("Unhandled exception in handler")
         else:
             logger.error(f"Communication fault: {fault}")
+        self.metrics.faults += 1
         self._fault = fault
+        if self._faulted_at is None:
+            self._faulted_at = time.monotonic()
+        if self._reconnector is None:
+            self._reconnector = asyncio.create_task(self._reconnect())
+
+    def reconnect_now(self) -> None:
+        """Skips the backoff delay, such as when the interface has been plugged in again."""
+        self._reconnect_now.set()
+
+    async def _reconnect(self) -> None:
+        attempt = 0
+        try:
+            while self._fault is not None:
+                delay = min(RECONNECT_MAX_DELAY, RECONNECT_MIN_DELAY * 2**attempt)
+                # Jitter keeps several interfaces from reconnecting in lockstep.
+                delay = random.uniform(delay / 2, delay)
+                self._reconnect_now.clear()
+                try:
+                    await asyncio.wait_for(self._reconnect_now.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                attempt += 1
+                self.metrics.reconnects += 1
+                logger.info(f"Reconnecting to the interface, attempt {attempt}")
+                # Faults reported while restarting are noticed by the loop.
+                self._fault = None
+                try:
+                    await self._link.restart(self)
+                except Exception as e:
+                    logger.debug(f"Failed to reconnect: {e}")
+                    self._fault = self._fault or Fault.EXCEPTION
+            logger.info("Reconnected to the interface")
+            # The device may have changed while the link was down so refresh everything.
+            self.invalidate()
+        finally:
+            self._reconnector = None
+
+    def async_add_listener(
+        self, section: Section, update_callback: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Listen for responses as soon as they are stored in the snapshot."""
+        listeners = self._listeners.setdefault(section, [])
+        listeners.append(update_callback)
+        return lambda: listeners.remove(update_callback)
+
+    def async_add_sleep_listener(
+        self, update_callback: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Listen for the device going to sleep and waking up."""
+        self._sleep_listeners.append(update_callback)
+        return lambda: self._sleep_listeners.remove(update_callback)
+
+    def subscribe(self, entity: Entity, sections: Iterable[Section]) -> None:
+        """Declare that the entity reads the sections."""
+        for section in sections:
+            self._subscribers.setdefault(section, []).append(entity)
+
+    def rebuild_subscriptions(self, registry: entity_registry.EntityRegistry) -> None:
+        """Only poll sections that are read by at least one enabled entity."""
+
+        def is_enabled(entity: Entity) -> bool:
+            entry = (
+                None
+                if entity.entity_id is None
+                else registry.async_get(entity.entity_id)
+            )
+            if entry is None:
+                return entity.entity_description.entity_registry_enabled_default
+            return not entry.disabled
+
+        self._subscribed = frozenset(
+            section
+            for section, entities in self._subscribers.items()
+            if any(is_enabled(x) for x in entities)
+        )
+        logger.debug(f"Subscribed to {sorted(x.value for x in self._subscribed)}")
+
+    @property
+    def data(self) -> Data:
+        """The snapshot of the latest responses, which is updated in place."""
+        return self._data
+
+    @property
+    def sleeping(self) -> bool:
+        """Whether the interface stopped hearing from the device."""
+        return self._idle
+
+    @property
+    def subscribed(self) -> frozenset[Section]:
+        """The sections that are read by at least one enabled entity."""
+        return self._subscribed
+
+    @subscribed.setter
+    def subscribed(self, sections: Iterable[Section]) -> None:
+        # Lets the sections be chosen without entities, such as by the benchmarks.
+        self._subscribed = frozenset(sections)
+
+    async def detect_ac_phases(self) -> List[int] | None:
+        """Returns the AC phases that respond, or None if the device doesn't respond."""
+        phases = []
+        for phase in range(1, MAX_AC_PHASES + 1):
+            if await self._poll(Section.ac(phase)) is not None:
+                phases.append(phase)
+            elif phase == 1:
+                return None
+        logger.debug(f"Detected AC phases {phases}")
+        return phases
+
+    def snapshot(self) -> dict[str, Any]:
+        """Encodes the latest responses for storage."""
+        return encode_responses({x.value: self._data.get(x) for x in Section})
+
+    def restore_snapshot(self, snapshot: Mapping[str, Any]) -> bool:
+        """Restores the responses from storage until they are polled again."""
+        responses = decode_responses(snapshot)
+        for key, response in responses.items():
+            try:
+                section = Section(key)
+            except ValueError:
+                continue
+            if section.phase is None or section.phase <= MAX_AC_PHASES:
+                self._data.set(section, response)
+        self._data.stale = bool(responses)
+        return self._data.stale
+
+    def restore_energy(self, key: str, value: float) -> None:
+        """Add the energy total from before the integration was restarted."""
+        self._data.energy[key] += value
+
+    def invalidate(self, section: Section | None = None) -> None:
+        """Poll the section, or all sections and the interface flags, on the next update."""
+        if section is None:
+            self._polled.clear()
+            self._standby_sent = None
+        else:
+            self._polled.pop(section, None)
 
     async def update(self) -> Data:
         if self._fault is not None:
-            raise UpdateFailed(f"Communication fault: {self._fault}")
+            raise UpdateFailed(f"Communication fault: {self._fault}, reconnecting")
         if self._idle:
-            raise UpdateFailed("Device is asleep")
+            # Keep the latest responses until the device wakes up instead of polling.
+            return self._data
 
-        if self.standby is not None:
+        # The interface flags only need to be sent when they change.
+        if self.standby is not None and self.standby != self._standby_sent:
             flags = InterfaceFlags.PANEL_DETECT
             if self.standby:
                 flags |= InterfaceFlags.STANDBY
-            await self._mk3.send_interface_request(flags)
-
-        data = Data()
-        data.version = self._version
-        data.led = await self._mk3.send_led_request()
-        data.dc = await self._mk3.send_dc_request()
-        for phase in range(1, AC_PHASES_POLLED + 1):
-            # It might be nice to optimize the polling based on AC_Response.ac_num_phases
-            # but it seems to report an incorrect number of phases on some devices so instead
-            # we only poll phases that are associated with enabled entities.
-            index = phase - 1
-            data.ac[index] = (
-                await self._mk3.send_ac_request(phase)
-                if any(x.enabled for x in self.ac_entities[index])
-                else None
+            async with self._link.hold(Priority.COMMAND) as mk3:
+                await self._timed("interface", mk3.send_interface_request(flags))
+            self._standby_sent = self.standby
+
+        now = time.monotonic()
+        started = time.perf_counter()
+        sections = self._poll_sections(now)
+        responses = await self._poll_sequential(sections)
+
+        for section, response in responses.items():
+            # A request that timed out keeps the last response, which expires with the
+            # maximum age, and is sent again on the next update.
+            if response is not None:
+                self._polled[section] = now
+        self.active = self._activity
+        self._activity = False
+        self._data.stale = False
+        if self._buffers:
+            self._data.aggregates = {
+                key: aggregate
+                for key, buffer in self._buffers.items()
+                if (aggregate := buffer.aggregate(self._sampled_at)) is not None
+            }
+            self._sampled_at = now
+        self.metrics.updates.record(time.perf_counter() - started)
+        return self._data
+
+    def _store(self, section: Section, response: Response | None) -> None:
+        old = self._data.get(section)
+        if response is old:
+            return
+        self._activity |= self._is_activity(section, old, response)
+        self._data.set(section, response)
+        now = time.monotonic()
+        if response is not None:
+            self._data.received_at[section] = now
+        if response is not None and self._buffers:
+            for key, (sampled_section, field) in SAMPLED_FIELDS.items():
+                if sampled_section == section:
+                    self._buffers[key].append(now, getattr(response, field))
+        if section == Section.POWER:
+            self._integrate_energy(response, now)
+        self._notify(section)
+
+    def _notify_sleep(self) -> None:
+        for listener in list(self._sleep_listeners):
+            listener()
+
+    def _notify(self, section: Section) -> None:
+        for listener in list(self._listeners.get(section, ())):
+            listener()
+
+    def _integrate_energy(self, response: PowerResponse | None, now: float) -> None:
+        previous = self._energy_sample
+        self._energy_sample = None if response is None else (now, response)
+        if previous is None or response is None:
+            return
+        elapsed = now - previous[0]
+        if elapsed > MAX_ENERGY_GAP:
+            return
+        # Trapezoidal integration of watts over seconds, converted to kWh.
+        energy = self._data.energy
+        for key, (field, sign) in ENERGY_FIELDS.items():
+            before = max(0.0, sign * getattr(previous[1], field))
+            after = max(0.0, sign * getattr(response, field))
+            energy[key] += (before + after) * elapsed / 7_200_000
+
+    def _is_activity(
+        self, section: Section, old: Response | None, new: Response | None
+    ) -> bool:
+        if old is None or new is None:
+            return old is not new
+        if section == Section.POWER:
+            return self._is_power_activity(new)
+        if section == Section.AC_L1:
+            return new.device_state != old.device_state
+        if section == Section.LED:
+            return new.on != old.on or new.blink != old.blink
+        return False
+
+    def _is_power_activity(self, response: PowerResponse) -> bool:
+        # Each sample is compared with a moving average rather than with the previous
+        # sample so that the noise between samples isn't taken for a load step.
+        active = False
+        for field in ACTIVITY_POWER_FIELDS:
+            value = getattr(response, field)
+            baseline = self._power_baseline.get(field, value)
+            active |= abs(value - baseline) >= self.activity_threshold
+            self._power_baseline[field] = baseline + ACTIVITY_SMOOTHING * (
+                value - baseline
             )
-        data.power = await self._mk3.send_power_request()
-        data.config = await self._mk3.send_config_request()
-        return data
+        return active
+
+    def _is_due(self, section: Section, now: float) -> bool:
+        if SECTION_CADENCE[section] == Cadence.FAST:
+            return True
+        if section == Section.LED and self.adaptive:
+            return True
+        polled = self._polled.get(section)
+        return polled is None or now - polled >= self.slow_poll_interval * POLL_SLACK
+
+    def _poll_sections(self, now: float) -> List[Section]:
+        sections = [Section.LED]
+        # The sampler keeps the DC and power responses fresh when it is running.
+        if self._sampler is None:
+            sections.append(Section.DC)
+        # AC_Response.ac_num_phases seems to report an incorrect number of phases on
+        # some devices so instead we only poll the phases that responded to detection
+        # and that are associated with enabled entities.
+        sections += [Section.ac(x) for x in self.ac_phases]
+        if self._sampler is None:
+            sections.append(Section.POWER)
+        sections.append(Section.CONFIG)
+        return [
+            x for x in sections if x in self._subscribed and self._is_due(x, now)
+        ]
+
+    async def _run_sampler(self) -> None:
+        period = 1 / self.sample_rate
+        while True:
+            started = time.monotonic()
+            if self._fault is None and not self._idle:
+                try:
+                    for section in (Section.DC, Section.POWER):
+                        if section not in self._subscribed:
+                            continue
+                        await self._poll(section, Priority.SAMPLE)
+                except Exception:
+                    logger.debug("Sampling failed", exc_info=True)
+            await asyncio.sleep(max(0, period - (time.monotonic() - started)))
+
+    async def _timed(self, request: str, awaitable: Awaitable[Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.metrics.record_request(request, time.perf_counter() - started)
+
+    async def _poll(
+        self, section: Section, priority: Priority = Priority.POLL
+    ) -> Response | None:
+        async with self._link.hold(priority) as mk3:
+            response = await self._timed(section.value, POLL_REQUESTS[section](mk3))
+        if response is None:
+            self.metrics.timeouts += 1
+        else:
+            self._store(section, response)
+        return response
+
+    async def _poll_sequential(
+        self, sections: List[Section]
+    ) -> dict[Section, Response | None]:
+        responses = {}
+        # The link is released between frames so that commands can slip in.
+        for section in sections:
+            responses[section] = await self._poll(section)
+        return responses
 
     async def set_remote_panel_state(
         self, mode: Mode, current_limit: float | None
     ) -> None:
-        await self._mk3.send_state_request(MODE_TO_SWITCH_STATE[mode], current_limit)
+        """Commands the remote panel state and waits for it to be read back.
+
+        Commands are merged while one is in flight so that only the latest mode and
+        current limit are sent, and the configuration is read back once they stop.
+        """
+        # Show the commanded state until the configuration has been read back.
+        self._data.pending_mode = mode
+        self._data.pending_current_limit = current_limit
+        self._command_generation += 1
+        self._notify(Section.CONFIG)
+        if self._commander is None or self._commander.done():
+            self._commander = asyncio.create_task(self._run_commands())
+        await asyncio.shield(self._commander)
+
+    async def _run_commands(self) -> None:
+        data = self._data
+        # Whether a command was sent after the configuration was last read back
+        unconfirmed = False
+        read_back = False
+        try:
+            while True:
+                generation = self._command_generation
+                mode = data.pending_mode
+                current_limit = data.pending_current_limit
+                if unconfirmed or not self._config_matches(mode, current_limit):
+                    async with self._link.hold(Priority.COMMAND) as mk3:
+                        await self._timed(
+                            "state",
+                            mk3.send_state_request(
+                                MODE_TO_SWITCH_STATE[mode], current_limit
+                            ),
+                        )
+                    unconfirmed = True
+                    await asyncio.sleep(COMMAND_SETTLE_TIME)
+                    if self._command_generation != generation:
+                        continue
+                    # Read back only the configuration rather than polling everything.
+                    response = await self._poll(Section.CONFIG, Priority.COMMAND)
+                    read_back = response is not None
+                    unconfirmed = not read_back
+                else:
+                    logger.debug("Skipped command that matches the configuration")
+                if self._command_generation == generation:
+                    return
+        finally:
+            data.pending_mode = None
+            data.pending_current_limit = None
+            if unconfirmed:
+                self.invalidate(Section.CONFIG)
+            elif read_back:
+                self._polled[Section.CONFIG] = time.monotonic()
+            self._notify(Section.CONFIG)
+
+    def _config_matches(self, mode: Mode, current_limit: float | None) -> bool:
+        config = self._data.config
+        age = self._data.age(Section.CONFIG, time.monotonic())
+        if age is None or age > CONFIG_MATCH_MAX_AGE:
+            return False
+        if config is None or self._data.configured_remote_panel_mode() != mode:
+            return False
+        if current_limit is None:
+            current_limit = config.maximum_current_limit
+        return (
+            abs(config.actual_current_limit - current_limit) < CURRENT_LIMIT_TOLERANCE
+        )
+
+
+class VictronMK3Coordinator(DataUpdateCoordinator[Data]):
+    def __init__(
+        self, hass: HomeAssistant, controller: Controller, options: Mapping[str, Any]
+    ) -> None:
+        self.controller = controller
+        self._adaptive = options.get(CONF_ADAPTIVE_POLLING, False)
+        self._min_interval = timedelta(
+            seconds=options.get(CONF_MIN_UPDATE_INTERVAL, DEFAULT_MIN_UPDATE_INTERVAL)
+        )
+        self._max_interval = timedelta(
+            seconds=options.get(CONF_MAX_UPDATE_INTERVAL, DEFAULT_MAX_UPDATE_INTERVAL)
+        )
+        self._awake_interval = (
+            self._min_interval
+            if self._adaptive
+            else timedelta(
+                seconds=options.get(CONF_FAST_POLL_INTERVAL, DEFAULT_FAST_POLL_INTERVAL)
+            )
+        )
+        super().__init__(
+            hass, logger, name=DOMAIN, update_interval=self._awake_interval
+        )
+        controller.async_add_sleep_listener(self._handle_sleep)
+
+    @callback
+    def _handle_sleep(self) -> None:
+        if self.controller.sleeping:
+            # Stop polling while the device sleeps. The interface keeps listening and
+            # reports the first frame it hears when the device wakes up.
+            self.update_interval = None
+            self.async_set_updated_data(self.controller.data)
+        else:
+            self.update_interval = self._awake_interval
+            self.hass.async_create_background_task(
+                self.async_request_refresh(), f"{DOMAIN} wake refresh"
+            )
+
+    async def _async_update_data(self) -> Data:
+        data = await self.controller.update()
+        if self.controller.sleeping:
+            self.update_interval = None
+        elif self._adaptive:
+            self.update_interval = adaptive_interval(
+                self.update_interval,
+                self.controller.active,
+                self._min_interval,
+                self._max_interval,
+            )
+        return data
+
+
+def adaptive_interval(
+    interval: timedelta, active: bool, minimum: timedelta, maximum: timedelta
+) -> timedelta:
+    """Polls quickly while the device is active and backs off while it is steady."""
+    if active:
+        return minimum
+    return min(interval * 2, maximum)
+
+
+class StateWriteFilter:
+    """Decides whether an entity's state changed enough to be worth writing.
+
+    A state is written when it differs from the last written state by at least the
+    deadband (or at all, for non-numeric states) or when the heartbeat interval has
+    elapsed since the last write. Tuples are compared element by element.
+    A heartbeat interval of zero writes every state.
+    """
+
+    def __init__(self, deadband: float | None, heartbeat_interval: float) -> None:
+        self.deadband = deadband
+        self.heartbeat_interval = heartbeat_interval
+        self._value: Any = None
+        self._written_at: float | None = None
+
+    def should_write(self, value: Any) -> bool:
+        now = time.monotonic()
+        if (
+            self._written_at is None
+            or now - self._written_at >= self.heartbeat_interval
+            or self._is_significant(value)
+        ):
+            self._value = value
+            self._written_at = now
+            return True
+        return False
+
+    def _is_significant(self, value: Any) -> bool:
+        return self._differs(value, self._value)
+
+    def _differs(self, value: Any, last: Any) -> bool:
+        if value == last:
+            return False
+        if isinstance(value, tuple) and isinstance(last, tuple):
+            return len(value) != len(last) or any(
+                self._differs(x, y) for x, y in zip(value, last)
+            )
+        if (
+            self.deadband is not None
+            and isinstance(value, (int, float))
+            and isinstance(last, (int, float))
+            and not isinstance(value, bool)
+        ):
+            return abs(value - last) >= self.deadband
+        return True
 
 
 class Context:
@@ -218,59 +1019,361 @@ class Context:
         coordinator: DataUpdateCoordinator[Data],
         device_id: str,
         device_info: DeviceInfo,
+        options: Mapping[str, Any],
+        store: Store[dict[str, Any]],
     ) -> None:
         self.controller = controller
         self.coordinator = coordinator
         self.device_id = device_id
         self.device_info = device_info
+        self.options = options
+        # Holds the pending save of the snapshot until it is written
+        self.store = store
+        self.max_age: float = options.get(CONF_MAX_AGE, DEFAULT_MAX_AGE)
+        # Whether the entry finished setting up, after its energy totals were restored
+        self.loaded = False
+        self._expiry_listeners: List[Callable[[], None]] = []
+
+    def age(self, sections: Iterable[Section]) -> float | None:
+        """Seconds since the oldest of the responses was received, if it is known."""
+        now = time.monotonic()
+        data = self.controller.data
+        return max(
+            (age for x in sections if (age := data.age(x, now)) is not None),
+            default=None,
+        )
+
+    def is_expired(self, age: float | None) -> bool:
+        """Whether the responses are too old for their values to be trusted."""
+        return self.max_age > 0 and age is not None and age > self.max_age
+
+    @callback
+    def async_add_expiry_listener(
+        self, update_callback: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Listen for the periodic check of whether the responses expired."""
+        self._expiry_listeners.append(update_callback)
+        return lambda: self._expiry_listeners.remove(update_callback)
+
+    @callback
+    def async_check_expiry(self) -> None:
+        # Only the entities are told, unlike the listeners of the coordinator which
+        # would take the unchanged snapshot for a new update.
+        for listener in list(self._expiry_listeners):
+            listener()
+
+    def make_write_filter(self, deadband_option: str | None = None) -> StateWriteFilter:
+        deadband = (
+            None
+            if deadband_option is None
+            else self.options.get(deadband_option, DEFAULT_DEADBANDS[deadband_option])
+        )
+        return StateWriteFilter(
+            deadband,
+            self.options.get(CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL),
+        )
+
+
+class VictronMK3Entity(CoordinatorEntity[VictronMK3Coordinator]):
+    """Base of the entities whose state is read from sections of the snapshot.
+
+    The entity description must have a `sections` attribute with the sections that the
+    entity reads. Subclasses read their value from the snapshot and apply it, and the
+    state is only written when the write filter lets it through.
+    """
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        context: Context,
+        entity_description: EntityDescription,
+        write_filter: StateWriteFilter,
+    ) -> None:
+        CoordinatorEntity.__init__(self, context.coordinator, entity_description.key)
+        self.context = context
+        self.entity_description = entity_description
+        context.controller.subscribe(self, entity_description.sections)
+        self._attr_device_info = context.device_info
+        self._attr_unique_id = f"{context.device_id}-{entity_description.key}"
+        self._attr_available = False
+        self._write_filter = write_filter
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        push = self.context.options.get(CONF_PUSH_UPDATES, False)
+        for section in self.entity_description.sections:
+            # Configuration changes are always pushed so that commands are reflected
+            # as soon as they have been read back.
+            if push or section == Section.CONFIG:
+                self.async_on_remove(
+                    self.context.controller.async_add_listener(
+                        section, self._handle_coordinator_update
+                    )
+                )
+        if self.context.max_age > 0:
+            self.async_on_remove(
+                self.context.async_add_expiry_listener(self._handle_coordinator_update)
+            )
+
+    @property
+    def available(self) -> bool:
+        return super().available and self._attr_available
+
+    @abstractmethod
+    def _read_value(self, data: Data) -> Any:
+        """Returns the value of the entity, or None if it is unknown."""
+
+    @abstractmethod
+    def _apply_value(self, value: Any) -> None:
+        """Sets the entity's attributes from a value that is known."""
+
+    def _extra_attributes(self, data: Data | None) -> dict[str, Any]:
+        """Returns the state attributes that are specific to the entity."""
+        return {}
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        data = self.coordinator.data
+        value = None if data is None else self._read_value(data)
+        age = self.context.age(self.entity_description.sections)
+        if value is None or self.context.is_expired(age):
+            self._attr_available = False
+        else:
+            self._attr_available = True
+            self._apply_value(value)
+
+        attributes = self._extra_attributes(data)
+        state = (value, tuple(attributes.values()))
+        # Flag values that were restored from before the restart until they are polled.
+        stale = data is not None and data.stale
+        if stale:
+            attributes["stale"] = True
+        # The age when the state is written. It isn't written just because it changed.
+        if age is not None:
+            attributes["age"] = round(age, 1)
+        self._attr_extra_state_attributes = attributes
+
+        if self._write_filter.should_write((state, stale) if self.available else None):
+            self.async_write_ha_state()
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up a config entry."""
+    if is_fleet_entry(entry.data):
+        return await _async_setup_fleet_entry(hass, entry)
+
     port = entry.data[CONF_PORT]
-    controller = Controller(port)
-
-    coordinator = DataUpdateCoordinator[Data](
-        hass,
-        logger,
-        name=DOMAIN,
-        update_interval=UPDATE_INTERVAL,
-        update_method=controller.update,
+    controller = Controller(
+        port,
+        slow_poll_interval=entry.options.get(
+            CONF_SLOW_POLL_INTERVAL, DEFAULT_SLOW_POLL_INTERVAL
+        ),
+        activity_threshold=entry.options.get(
+            CONF_ACTIVITY_THRESHOLD, DEFAULT_ACTIVITY_THRESHOLD
+        ),
+        adaptive=entry.options.get(CONF_ADAPTIVE_POLLING, False),
+        sample_rate=entry.options.get(CONF_SAMPLE_RATE, DEFAULT_SAMPLE_RATE),
+        capture_path=entry.options.get(CONF_CAPTURE_PATH) or None,
+        io_thread=entry.options.get(CONF_IO_THREAD, False),
     )
+    coordinator = VictronMK3Coordinator(hass, controller, entry.options)
 
-    device = device_registry.async_get(hass).async_get_or_create(
+    # The device is identified by the entry rather than by the port so that it keeps
+    # its entities when the interface moves to another port.
+    identifiers = {(DOMAIN, entry.entry_id)}
+    devices = device_registry.async_get(hass)
+    _async_migrate_device_identifiers(devices, entry, identifiers)
+    device = devices.async_get_or_create(
         config_entry_id=entry.entry_id,
         name=entry.title,
         manufacturer="Victron Energy",
         model=entry.data.get(CONF_MODEL, None),
         serial_number=entry.data.get(CONF_SERIAL_NUMBER, None),
-        identifiers={(DOMAIN, port)},
+        identifiers=identifiers,
     )
 
+    context = Context(
+        controller,
+        coordinator,
+        device.id,
+        DeviceInfo(identifiers=identifiers),
+        entry.options,
+        _get_store(hass, entry),
+    )
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = {
-        KEY_CONTEXT: Context(
-            controller, coordinator, device.id, DeviceInfo(identifiers={(DOMAIN, port)})
-        )
-    }
+    hass.data[DOMAIN][entry.entry_id] = {KEY_CONTEXT: context}
 
     await controller.start()
     entry.async_on_unload(controller.stop)
 
-    await coordinator.async_config_entry_first_refresh()
+    # Detect the AC phases once and cache them since absent phases cost a timeout.
+    ac_phases = entry.data.get(CONF_AC_PHASES)
+    if ac_phases is None:
+        ac_phases = await controller.detect_ac_phases()
+        if ac_phases is not None:
+            hass.config_entries.async_update_entry(
+                entry, data={**entry.data, CONF_AC_PHASES: ac_phases}
+            )
+    if ac_phases is not None:
+        controller.ac_phases = ac_phases
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    # Start from the responses that were stored before the restart, if any, and refresh
+    # them in the background so that setup doesn't wait for a full poll.
+    store = context.store
+    stored = await store.async_load()
+    if stored is not None and controller.restore_snapshot(stored):
+        coordinator.async_set_updated_data(controller.data)
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} warm start refresh"
+        )
+    else:
+        await coordinator.async_config_entry_first_refresh()
+
+    # When the pending save is due. A save stays pending between writes so that the
+    # store flushes the latest snapshot when Home Assistant stops. Each call replaces
+    # the pending save so the deadline is kept rather than postponed on every update.
+    save_due: float | None = None
+
+    @callback
+    def _async_schedule_save() -> None:
+        nonlocal save_due
+        if not coordinator.last_update_success:
+            return
+        now = time.monotonic()
+        if save_due is None or now >= save_due:
+            save_due = now + SAVE_INTERVAL
+        store.async_delay_save(controller.snapshot, save_due - now)
+
+    entry.async_on_unload(coordinator.async_add_listener(_async_schedule_save))
+
+    if context.max_age > 0:
+
+        @callback
+        def _async_expire(now: datetime) -> None:
+            # Let the entities notice that their responses expired even while nothing
+            # is being polled, such as while the device sleeps or the link is stuck.
+            context.async_check_expiry()
+
+        entry.async_on_unload(
+            async_track_time_interval(
+                hass, _async_expire, timedelta(seconds=context.max_age / 2)
+            )
+        )
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # Stop polling responses that no enabled entity reads.
+    registry = entity_registry.async_get(hass)
+    controller.rebuild_subscriptions(registry)
+
+    @callback
+    def _async_entity_registry_updated(
+        event: Event[entity_registry.EventEntityRegistryUpdatedData],
+    ) -> None:
+        controller.rebuild_subscriptions(registry)
+
+    entry.async_on_unload(
+        hass.bus.async_listen(
+            entity_registry.EVENT_ENTITY_REGISTRY_UPDATED,
+            _async_entity_registry_updated,
+            event_filter=_is_entity_enabled_change,
+        )
+    )
+
+    if entry.options.get(CONF_METRICS_ENDPOINT, False):
+        # Imported here because the view renders the types defined in this module.
+        from .prometheus import async_register_view
+
+        async_register_view(hass)
+
+    context.loaded = True
+    async_dispatcher_send(hass, SIGNAL_MEMBERS_CHANGED)
     await _async_setup_services(hass)
     return True
 
 
+async def _async_setup_fleet_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up the entry that totals the power and energy of every interface."""
+    aggregator = FleetAggregator(hass, entry.options.get(CONF_PARTIAL_TOTALS, False))
+    hass.data.setdefault(DOMAIN, {})
+    hass.data[DOMAIN][entry.entry_id] = {KEY_FLEET: aggregator}
+    entry.async_on_unload(aggregator.async_start())
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    await hass.config_entries.async_forward_entry_setups(entry, FLEET_PLATFORMS)
+    return True
+
+
+@callback
+def _async_migrate_device_identifiers(
+    devices: device_registry.DeviceRegistry,
+    entry: ConfigEntry,
+    identifiers: set[tuple[str, str]],
+) -> None:
+    """Re-identifies the device of an entry that was identified by its port.
+
+    The device keeps its ID so the unique IDs of its entities don't change.
+    """
+    if devices.async_get_device(identifiers=identifiers) is not None:
+        return
+    for device in device_registry.async_entries_for_config_entry(
+        devices, entry.entry_id
+    ):
+        if device.identifiers != identifiers:
+            devices.async_update_device(device.id, new_identifiers=identifiers)
+            return
+
+
+@callback
+def _is_entity_enabled_change(
+    event_data: entity_registry.EventEntityRegistryUpdatedData,
+) -> bool:
+    return (
+        event_data["action"] != "update"
+        or "disabled_by" in event_data.get("changes", {})
+    )
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options or detected AC phases change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+    if is_fleet_entry(entry.data):
+        platforms = FLEET_PLATFORMS
+    else:
+        platforms = PLATFORMS
+    if unload_ok := await hass.config_entries.async_unload_platforms(entry, platforms):
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        if KEY_CONTEXT in entry_data:
+            context = entry_data[KEY_CONTEXT]
+            # Saving replaces the pending save so that it can't write after removal.
+            await context.store.async_save(context.controller.snapshot())
+            async_dispatcher_send(hass, SIGNAL_MEMBERS_CHANGED)
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored snapshot when a config entry is removed."""
+    if is_fleet_entry(entry.data):
+        return
+    await _get_store(hass, entry).async_remove()
+    hass.data.get(_KEY_STORES, {}).pop(entry.entry_id, None)
+    async_dispatcher_send(hass, SIGNAL_MEMBER_REMOVED, entry.entry_id)
+
+
+def _get_store(hass: HomeAssistant, entry: ConfigEntry) -> Store[dict[str, Any]]:
+    """Returns the one store of the entry, which outlives its reloads until removal."""
+    stores = hass.data.setdefault(_KEY_STORES, {})
+    if entry.entry_id not in stores:
+        stores[entry.entry_id] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}"
+        )
+    return stores[entry.entry_id]
+
+
 async def _async_setup_services(hass: HomeAssistant) -> None:
     async def _handle_set_remote_panel_state(call: ServiceCall) -> None:
         device_id = call.data[CONF_DEVICE_ID]
@@ -285,20 +1388,83 @@ async def _async_setup_services(hass: HomeAssistant) -> None:
         schema=SERVICE_SCHEMA,
     )
 
+    async def _handle_detect_ac_phases(call: ServiceCall) -> None:
+        await detect_ac_phases(hass, call.data[CONF_DEVICE_ID])
 
-async def set_remote_panel_state(
-    hass: HomeAssistant, device_id: str, mode: Mode, current_limit: float | None
-) -> None:
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DETECT_AC_PHASES,
+        _handle_detect_ac_phases,
+        schema=SERVICE_DETECT_AC_PHASES_SCHEMA,
+    )
+
+    async def _handle_get_snapshot(call: ServiceCall) -> ServiceResponse:
+        return get_snapshot(hass, call.data.get(CONF_DEVICE_ID))
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_SNAPSHOT,
+        _handle_get_snapshot,
+        schema=SERVICE_GET_SNAPSHOT_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def _get_entry_id(hass: HomeAssistant, device_id: str) -> str:
     device = device_registry.async_get(hass).async_get(device_id)
     if device is None:
         raise DeviceNotFound(f"Device ID {device_id} is not valid")
 
     for entry_id in device.config_entries:
-        entry_data = hass.data[DOMAIN].get(entry_id, None)
-        if entry_data is not None:
-            context = entry_data[KEY_CONTEXT]
-            await context.controller.set_remote_panel_state(mode, current_limit)
-            await context.coordinator.async_request_refresh()
-            return
+        if KEY_CONTEXT in hass.data[DOMAIN].get(entry_id, {}):
+            return entry_id
 
     raise HomeAssistantError(f"Device ID {device_id} cannot handle this request")
+
+
+async def set_remote_panel_state(
+    hass: HomeAssistant, device_id: str, mode: Mode, current_limit: float | None
+) -> None:
+    entry_id = _get_entry_id(hass, device_id)
+    context = hass.data[DOMAIN][entry_id][KEY_CONTEXT]
+    await context.controller.set_remote_panel_state(mode, current_limit)
+
+
+async def detect_ac_phases(hass: HomeAssistant, device_id: str) -> None:
+    entry_id = _get_entry_id(hass, device_id)
+    context = hass.data[DOMAIN][entry_id][KEY_CONTEXT]
+    ac_phases = await context.controller.detect_ac_phases()
+    if ac_phases is None:
+        raise HomeAssistantError("Device is not responding")
+    entry = hass.config_entries.async_get_entry(entry_id)
+    if ac_phases != entry.data.get(CONF_AC_PHASES):
+        # The update listener reloads the entry to add or remove the phase entities.
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, CONF_AC_PHASES: ac_phases}
+        )
+
+
+@callback
+def get_snapshot(
+    hass: HomeAssistant, device_ids: List[str] | None = None
+) -> dict[str, Any]:
+    """Describes the latest snapshot of each device, or of every loaded device."""
+    if device_ids is None:
+        entry_ids = [
+            entry.entry_id
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            if KEY_CONTEXT in hass.data.get(DOMAIN, {}).get(entry.entry_id, {})
+        ]
+    else:
+        entry_ids = [_get_entry_id(hass, x) for x in device_ids]
+    now = time.monotonic()
+    devices = {}
+    for entry_id in entry_ids:
+        context = hass.data[DOMAIN][entry_id][KEY_CONTEXT]
+        devices[context.device_id] = {
+            "name": hass.config_entries.async_get_entry(entry_id).title,
+            "available": context.coordinator.last_update_success,
+            "sleeping": context.controller.sleeping,
+            **context.controller.data.as_dict(now),
+        }
+    return {"devices": devices}
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorEntity,
+    BinarySensorEntityDescription,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from . import Context
+from .const import (
+    DOMAIN,
+    KEY_CONTEXT,
+)
+
+
+class VictronMK3SleepingBinarySensorEntity(CoordinatorEntity, BinarySensorEntity):
+    _attr_has_entity_name = True
+
+    entity_description = BinarySensorEntityDescription(
+        key="sleeping",
+        name="Sleeping",
+        icon="mdi:sleep",
+        entity_category=EntityCategory.DIAGNOSTIC,
+    )
+
+    def __init__(self, context: Context):
+        CoordinatorEntity.__init__(
+            self,
+            context.coordinator,
+            VictronMK3SleepingBinarySensorEntity.entity_description.key,
+        )
+        self.context = context
+        self._attr_device_info = context.device_info
+        self._attr_unique_id = f"{context.device_id}-{VictronMK3SleepingBinarySensorEntity.entity_description.key}"
+        self._attr_is_on = context.controller.sleeping
+        # The availability and value that were last written
+        self._written: tuple[bool, bool | None] | None = None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # The coordinator stops polling while the device sleeps so listen to the
+        # controller to notice when it wakes up.
+        self.async_on_remove(
+            self.context.controller.async_add_sleep_listener(
+                self._handle_coordinator_update
+            )
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._attr_is_on = self.context.controller.sleeping
+        # Every update reaches the entity but it only changes on sleep and wake.
+        state = (self.available, self._attr_is_on)
+        if state != self._written:
+            self._written = state
+            self.async_write_ha_state()
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    context = hass.data[DOMAIN][entry.entry_id][KEY_CONTEXT]
+    async_add_entities([VictronMK3SleepingBinarySensorEntity(context)])
@@ -1,15 +1,60 @@
 from __future__ import annotations
 
 from homeassistant.components import usb
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
 from homeassistant.const import CONF_MODEL, CONF_NAME, CONF_PORT
+from homeassistant.core import callback
 from typing import Any
 from victron_mk3 import ProbeResult, probe
 import voluptuous as vol
 
-from .const import CONF_SERIAL_NUMBER, DOMAIN
+from .const import (
+    CONF_ACTIVITY_THRESHOLD,
+    CONF_ADAPTIVE_POLLING,
+    CONF_CAPTURE_PATH,
+    CONF_CURRENT_DEADBAND,
+    CONF_ENERGY_DEADBAND,
+    CONF_ENTRY_TYPE,
+    CONF_EXTERNAL_STATISTICS,
+    CONF_FAST_POLL_INTERVAL,
+    CONF_FREQUENCY_DEADBAND,
+    CONF_HEARTBEAT_INTERVAL,
+    CONF_IO_THREAD,
+    CONF_MAX_AGE,
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_METRICS_ENDPOINT,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_PARTIAL_TOTALS,
+    CONF_POWER_DEADBAND,
+    CONF_PUSH_UPDATES,
+    CONF_SAMPLE_RATE,
+    CONF_SERIAL_NUMBER,
+    CONF_SLOW_POLL_INTERVAL,
+    CONF_VOLTAGE_DEADBAND,
+    DEFAULT_ACTIVITY_THRESHOLD,
+    DEFAULT_DEADBANDS,
+    DEFAULT_FAST_POLL_INTERVAL,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_MAX_AGE,
+    DEFAULT_MAX_UPDATE_INTERVAL,
+    DEFAULT_MIN_UPDATE_INTERVAL,
+    DEFAULT_SAMPLE_RATE,
+    DEFAULT_SLOW_POLL_INTERVAL,
+    DOMAIN,
+    ENTRY_TYPE_FLEET,
+    KEY_CONTEXT,
+    MAX_SAMPLE_RATE,
+    MIN_POLL_INTERVAL,
+)
+from .fleet import is_fleet_entry
 
 DEFAULT_ENTRY_NAME = "Victron MK3"
+DEFAULT_FLEET_NAME = "Victron MK3 Fleet"
 
 
 class MK3ConfigFlow(ConfigFlow, domain=DOMAIN):
@@ -21,10 +66,39 @@ class MK3ConfigFlow(ConfigFlow, domain=DOMAIN):
     def __init__(self) -> None:
         self._discovery_info: usb.UsbServiceInfo = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        if is_fleet_entry(config_entry.data):
+            return FleetOptionsFlow()
+        return MK3OptionsFlow()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
         """Step when user initializes a integration."""
+        return self.async_show_menu(step_id="user", menu_options=["device", "fleet"])
+
+    async def async_step_fleet(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Add the device that totals the power and energy of every interface."""
+        self._async_abort_entries_match({CONF_ENTRY_TYPE: ENTRY_TYPE_FLEET})
+        if user_input is not None:
+            return self.async_create_entry(
+                title=user_input[CONF_NAME], data={CONF_ENTRY_TYPE: ENTRY_TYPE_FLEET}
+            )
+        return self.async_show_form(
+            step_id="fleet",
+            data_schema=vol.Schema(
+                {vol.Required(CONF_NAME, default=DEFAULT_FLEET_NAME): str}
+            ),
+        )
+
+    async def async_step_device(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Add an interface by its port."""
         errors = {}
         placeholders = {}
         if user_input is not None:
@@ -42,7 +116,7 @@ class MK3ConfigFlow(ConfigFlow, domain=DOMAIN):
             user_input[CONF_PORT] = ""
 
         return self.async_show_form(
-            step_id="user",
+            step_id="device",
             data_schema=vol.Schema(
                 {
                     vol.Required(CONF_NAME, default=user_input[CONF_NAME]): str,
@@ -60,6 +134,19 @@ class MK3ConfigFlow(ConfigFlow, domain=DOMAIN):
         await self.async_set_unique_id(
             f"{discovery_info.vid}:{discovery_info.pid}_{discovery_info.serial_number}_{discovery_info.manufacturer}_{discovery_info.description}"
         )
+        # if the device was plugged in again, reconnect to it without waiting for the
+        # backoff delay
+        for entry in self._async_current_entries(include_ignore=False):
+            if entry.data.get(CONF_PORT) != discovery_info.device:
+                continue
+            entry_data = self.hass.data.get(DOMAIN, {}).get(entry.entry_id)
+            if entry_data is not None:
+                entry_data[KEY_CONTEXT].controller.reconnect_now()
+        # follow the device if it was assigned a different port; the entry's update
+        # listener already reloads it when its data changes
+        self._abort_if_unique_id_configured(
+            updates={CONF_PORT: discovery_info.device}, reload_on_update=False
+        )
         # check if this device is not already configured
         self._async_abort_entries_match({CONF_PORT: discovery_info.device})
         # check if we can make a valid connection
@@ -92,3 +179,148 @@ class MK3ConfigFlow(ConfigFlow, domain=DOMAIN):
             step_id="discovery_confirm",
             description_placeholders={"model": self._discovery_info.description},
         )
+
+
+class MK3OptionsFlow(OptionsFlow):
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the polling options."""
+        errors = {}
+        if user_input is not None:
+            if (
+                user_input[CONF_MIN_UPDATE_INTERVAL]
+                > user_input[CONF_MAX_UPDATE_INTERVAL]
+            ):
+                errors[CONF_MIN_UPDATE_INTERVAL] = "invalid_interval_range"
+            # A slow section is polled by the first update after its interval has
+            # elapsed, so its response can get this old before it is replaced.
+            longest_update_interval = (
+                user_input[CONF_MAX_UPDATE_INTERVAL]
+                if user_input[CONF_ADAPTIVE_POLLING]
+                else user_input[CONF_FAST_POLL_INTERVAL]
+            )
+            max_age = user_input[CONF_MAX_AGE]
+            if (
+                0
+                < max_age
+                < user_input[CONF_SLOW_POLL_INTERVAL] + longest_update_interval
+            ):
+                errors[CONF_MAX_AGE] = "invalid_max_age"
+            if not errors:
+                return self.async_create_entry(data=user_input)
+
+        options = {**self.config_entry.options, **(user_input or {})}
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_FAST_POLL_INTERVAL,
+                        default=options.get(
+                            CONF_FAST_POLL_INTERVAL, DEFAULT_FAST_POLL_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=MIN_POLL_INTERVAL)),
+                    vol.Required(
+                        CONF_SLOW_POLL_INTERVAL,
+                        default=options.get(
+                            CONF_SLOW_POLL_INTERVAL, DEFAULT_SLOW_POLL_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=MIN_POLL_INTERVAL)),
+                    vol.Required(
+                        CONF_PUSH_UPDATES,
+                        default=options.get(CONF_PUSH_UPDATES, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_IO_THREAD,
+                        default=options.get(CONF_IO_THREAD, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_ADAPTIVE_POLLING,
+                        default=options.get(CONF_ADAPTIVE_POLLING, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_MIN_UPDATE_INTERVAL,
+                        default=options.get(
+                            CONF_MIN_UPDATE_INTERVAL, DEFAULT_MIN_UPDATE_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=MIN_POLL_INTERVAL)),
+                    vol.Required(
+                        CONF_MAX_UPDATE_INTERVAL,
+                        default=options.get(
+                            CONF_MAX_UPDATE_INTERVAL, DEFAULT_MAX_UPDATE_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=MIN_POLL_INTERVAL)),
+                    vol.Required(
+                        CONF_ACTIVITY_THRESHOLD,
+                        default=options.get(
+                            CONF_ACTIVITY_THRESHOLD, DEFAULT_ACTIVITY_THRESHOLD
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Required(
+                        CONF_SAMPLE_RATE,
+                        default=options.get(CONF_SAMPLE_RATE, DEFAULT_SAMPLE_RATE),
+                    ): vol.All(
+                        vol.Coerce(float), vol.Range(min=0, max=MAX_SAMPLE_RATE)
+                    ),
+                    vol.Required(
+                        CONF_HEARTBEAT_INTERVAL,
+                        default=options.get(
+                            CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Required(
+                        CONF_MAX_AGE,
+                        default=options.get(CONF_MAX_AGE, DEFAULT_MAX_AGE),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    **{
+                        vol.Required(
+                            key, default=options.get(key, DEFAULT_DEADBANDS[key])
+                        ): vol.All(vol.Coerce(float), vol.Range(min=0))
+                        for key in (
+                            CONF_VOLTAGE_DEADBAND,
+                            CONF_CURRENT_DEADBAND,
+                            CONF_POWER_DEADBAND,
+                            CONF_FREQUENCY_DEADBAND,
+                            CONF_ENERGY_DEADBAND,
+                        )
+                    },
+                    vol.Required(
+                        CONF_EXTERNAL_STATISTICS,
+                        default=options.get(CONF_EXTERNAL_STATISTICS, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_METRICS_ENDPOINT,
+                        default=options.get(CONF_METRICS_ENDPOINT, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_CAPTURE_PATH,
+                        default=options.get(CONF_CAPTURE_PATH, ""),
+                    ): str,
+                }
+            ),
+            errors=errors,
+        )
+
+
+class FleetOptionsFlow(OptionsFlow):
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the availability of the totals."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_PARTIAL_TOTALS,
+                        default=self.config_entry.options.get(
+                            CONF_PARTIAL_TOTALS, False
+                        ),
+                    ): bool,
+                }
+            ),
+        )
@@ -1,10 +1,87 @@
 DOMAIN = "victron_mk3"
 
 KEY_CONTEXT = "context"
+KEY_FLEET = "fleet"
+
+# The type of the entry that totals the power and energy of every interface
+ENTRY_TYPE_FLEET = "fleet"
 
 CONF_SERIAL_NUMBER = "serial_number"
+CONF_AC_PHASES = "ac_phases"
 CONF_CURRENT_LIMIT = "current_limit"
+CONF_FAST_POLL_INTERVAL = "fast_poll_interval"
+CONF_SLOW_POLL_INTERVAL = "slow_poll_interval"
+CONF_PUSH_UPDATES = "push_updates"
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_MIN_UPDATE_INTERVAL = "min_update_interval"
+CONF_MAX_UPDATE_INTERVAL = "max_update_interval"
+CONF_ACTIVITY_THRESHOLD = "activity_threshold"
+CONF_SAMPLE_RATE = "sample_rate"
+CONF_HEARTBEAT_INTERVAL = "heartbeat_interval"
+CONF_VOLTAGE_DEADBAND = "voltage_deadband"
+CONF_CURRENT_DEADBAND = "current_deadband"
+CONF_POWER_DEADBAND = "power_deadband"
+CONF_FREQUENCY_DEADBAND = "frequency_deadband"
+CONF_ENERGY_DEADBAND = "energy_deadband"
+CONF_CAPTURE_PATH = "capture_path"
+CONF_IO_THREAD = "io_thread"
+CONF_EXTERNAL_STATISTICS = "external_statistics"
+CONF_METRICS_ENDPOINT = "metrics_endpoint"
+CONF_ENTRY_TYPE = "entry_type"
+CONF_PARTIAL_TOTALS = "partial_totals"
+CONF_MAX_AGE = "max_age"
+
+# The MK3 supports up to 4 AC phases. The phases that respond are detected when the
+# integration is set up and cached in the config entry's data.
+MAX_AC_PHASES = 4
+# The phases that are polled until detection succeeds, such as while the device is asleep
+DEFAULT_AC_PHASES = [1, 2, 3]
+
+# Polling cadences in seconds.
+# Fast responses (DC, AC, power) are polled on every update whereas slow responses
+# (config, LEDs) are only polled once the slow interval has elapsed.
+DEFAULT_FAST_POLL_INTERVAL = 2.0
+DEFAULT_SLOW_POLL_INTERVAL = 30.0
+MIN_POLL_INTERVAL = 0.25
+
+# Bounds of the update interval in seconds when adaptive polling is enabled.
+# The interval drops to the minimum while the device is active and doubles on each
+# quiet update until it reaches the maximum.
+DEFAULT_MIN_UPDATE_INTERVAL = 0.25
+DEFAULT_MAX_UPDATE_INTERVAL = 10.0
+# Departures in watts of the power from its moving average that count as activity.
+# Well above the noise of the power readings so that a steady load lets the interval
+# back off.
+DEFAULT_ACTIVITY_THRESHOLD = 200.0
+
+# Rate in Hz at which the DC and power responses are sampled between updates.
+# Zero disables sampling.
+DEFAULT_SAMPLE_RATE = 0.0
+MAX_SAMPLE_RATE = 20.0
+# Number of samples retained for each sampled measurement.
+SAMPLE_BUFFER_CAPACITY = 1024
+
+# Entity states are only written when they change by more than their deadband or when
+# the heartbeat interval (in seconds) has elapsed since they were last written.
+DEFAULT_HEARTBEAT_INTERVAL = 300.0
+DEFAULT_DEADBANDS = {
+    CONF_VOLTAGE_DEADBAND: 0.05,
+    CONF_CURRENT_DEADBAND: 0.1,
+    CONF_POWER_DEADBAND: 5.0,
+    CONF_FREQUENCY_DEADBAND: 0.05,
+    CONF_ENERGY_DEADBAND: 0.01,
+}
+
+# The states of the sensors whose statistics are compiled by the integration are only
+# needed for display, so they are written with deadbands this many times wider and a
+# heartbeat interval of at least this many seconds.
+STATISTICS_DEADBAND_FACTOR = 10.0
+STATISTICS_HEARTBEAT_INTERVAL = 3600.0
+
+# Entities become unavailable once the responses they read are older than this many
+# seconds. Zero disables the limit.
+DEFAULT_MAX_AGE = 0.0
 
-# The MK3 supports up to 4 but do any devices actually have more than 3?
-# Perhaps this value could be determined dynamically
-AC_PHASES_POLLED = 3
+# Energy is not integrated across gaps between power samples longer than this many
+# seconds, such as while the device is asleep.
+MAX_ENERGY_GAP = 60.0
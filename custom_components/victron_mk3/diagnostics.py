@@ -0,0 +1,57 @@
+"""Diagnostics support for the victron_mk3 integration."""
+
+from __future__ import annotations
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+import time
+from typing import Any
+
+from .const import CONF_SERIAL_NUMBER, DOMAIN, KEY_CONTEXT, KEY_FLEET
+from .fleet import is_fleet_entry
+
+TO_REDACT = {CONF_SERIAL_NUMBER}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    if is_fleet_entry(entry.data):
+        aggregator = hass.data[DOMAIN][entry.entry_id][KEY_FLEET]
+        return {
+            "entry": {"data": dict(entry.data), "options": dict(entry.options)},
+            "fleet": {
+                "members": aggregator.members,
+                "members_available": aggregator.members_available,
+                "totals": aggregator.totals,
+            },
+        }
+
+    context = hass.data[DOMAIN][entry.entry_id][KEY_CONTEXT]
+    controller = context.controller
+    coordinator = context.coordinator
+    now = time.monotonic()
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "controller": {
+            "sample_rate": controller.sample_rate,
+            "subscribed": sorted(x.value for x in controller.subscribed),
+            "active": controller.active,
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": None
+            if coordinator.update_interval is None
+            else coordinator.update_interval.total_seconds(),
+        },
+        "metrics": controller.metrics.as_dict(),
+        "ages": {
+            section.value: controller.data.age(section, now)
+            for section in controller.data.received_at
+        },
+    }
@@ -0,0 +1,139 @@
+"""Compiles long-term statistics inside the integration and imports them in bulk."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import math
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_utc_time_change
+from homeassistant.helpers.typing import StateType
+from typing import Callable, Iterable
+from victron_mk3 import logger
+
+from . import Data
+from .const import DOMAIN
+
+# Length of the buckets that samples are averaged into before they are combined into
+# hourly statistics, so that changes in the polling rate don't skew the mean.
+BUCKET_MINUTES = 5
+
+
+@dataclass
+class _Bucket:
+    count: int = 0
+    total: float = 0.0
+    minimum: float = math.inf
+    maximum: float = -math.inf
+
+    def add(self, mean: float, minimum: float, maximum: float, count: int) -> None:
+        self.count += count
+        self.total += mean * count
+        self.minimum = min(self.minimum, minimum)
+        self.maximum = max(self.maximum, maximum)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count
+
+
+@dataclass(kw_only=True)
+class StatisticSource:
+    """A measurement that is compiled into statistics."""
+
+    key: str
+    name: str
+    unit_of_measurement: str | None
+    value_fn: Callable[[Data], StateType]
+
+
+class StatisticsCompiler:
+    """Averages samples into 5-minute buckets and imports hourly statistics.
+
+    The recorder only accepts external statistics for whole hours so the statistics
+    for each hour are imported shortly after the hour has passed. The buckets of the
+    hour in which Home Assistant restarts only cover the samples after the restart.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        statistic_id_prefix: str,
+        name_prefix: str,
+        sources: Iterable[StatisticSource],
+    ) -> None:
+        self._hass = hass
+        self._sources = {x.key: x for x in sources}
+        self._metadata: dict[str, StatisticMetaData] = {
+            x.key: StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=f"{name_prefix} {x.name}",
+                source=DOMAIN,
+                statistic_id=f"{DOMAIN}:{statistic_id_prefix}_{x.key}",
+                unit_of_measurement=x.unit_of_measurement,
+            )
+            for x in self._sources.values()
+        }
+        # The hour that is being compiled and its buckets by source and start time
+        self._hour: datetime | None = None
+        self._buckets: dict[str, dict[datetime, _Bucket]] = {}
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Imports the statistics of each hour even if no samples arrive after it."""
+        return async_track_utc_time_change(
+            self._hass, self._async_hour_elapsed, minute=0, second=10
+        )
+
+    @callback
+    def add(self, now: datetime, data: Data) -> None:
+        """Adds the latest values, and their aggregates if they were sampled."""
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        if self._hour is not None and self._hour != hour:
+            self._import()
+        self._hour = hour
+        start = hour + timedelta(minutes=now.minute - now.minute % BUCKET_MINUTES)
+        for key, source in self._sources.items():
+            value = source.value_fn(data)
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            bucket = self._buckets.setdefault(key, {}).setdefault(start, _Bucket())
+            aggregate = data.aggregates.get(key)
+            if aggregate is None:
+                bucket.add(value, value, value, 1)
+            else:
+                bucket.add(
+                    aggregate.mean,
+                    aggregate.minimum,
+                    aggregate.maximum,
+                    aggregate.count,
+                )
+
+    @callback
+    def _async_hour_elapsed(self, now: datetime) -> None:
+        if self._hour is not None and self._hour < now.replace(
+            minute=0, second=0, microsecond=0
+        ):
+            self._import()
+            self._hour = None
+
+    def _import(self) -> None:
+        if "recorder" not in self._hass.config.components:
+            logger.debug("Recorder is not loaded, discarding statistics")
+            self._buckets.clear()
+            return
+        for key, metadata in self._metadata.items():
+            buckets = list(self._buckets.get(key, {}).values())
+            if not buckets:
+                continue
+            statistic = StatisticData(
+                start=self._hour,
+                mean=sum(x.mean for x in buckets) / len(buckets),
+                min=min(x.minimum for x in buckets),
+                max=max(x.maximum for x in buckets),
+            )
+            async_add_external_statistics(self._hass, metadata, [statistic])
+        self._buckets.clear()
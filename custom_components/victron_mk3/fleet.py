@@ -0,0 +1,153 @@
+"""Totals across every interface for the optional fleet entry."""
+
+from __future__ import annotations
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from typing import TYPE_CHECKING, Callable, List
+
+from .const import CONF_ENTRY_TYPE, DOMAIN, ENTRY_TYPE_FLEET, KEY_CONTEXT
+
+if TYPE_CHECKING:
+    from . import Context
+
+# Sent when an interface entry is set up or unloaded.
+SIGNAL_MEMBERS_CHANGED = f"{DOMAIN}_members_changed"
+# Sent with the entry ID when an interface entry is removed.
+SIGNAL_MEMBER_REMOVED = f"{DOMAIN}_member_removed"
+
+# Power fields that are summed across the members, keyed by the fleet sensor.
+POWER_TOTALS: dict[str, str] = {
+    "ac_input_power": "ac_mains_power",
+    "ac_output_power": "ac_inverter_power",
+    "battery_power": "dc_power",
+}
+
+
+def is_fleet_entry(entry_data: dict) -> bool:
+    return entry_data.get(CONF_ENTRY_TYPE) == ENTRY_TYPE_FLEET
+
+
+class FleetAggregator:
+    """Sums the power and energy of every interface entry each time one updates.
+
+    Updates of several members that arrive together are combined into one pass. The
+    power totals are only available while every member is available, unless partial
+    totals are allowed in which case they sum the members that are available. The
+    energy totals always include every member because a member's energy doesn't
+    change while it is offline and leaving it out would look like a meter reset. The
+    latest energy of each member is kept while it is unloaded, such as while it
+    reloads, and the energy totals are unavailable until every enabled member has
+    reported, such as while the members set up after a restart.
+    """
+
+    def __init__(self, hass: HomeAssistant, partial_totals: bool) -> None:
+        self._hass = hass
+        self.partial_totals = partial_totals
+        self._members: dict[str, CALLBACK_TYPE] = {}
+        self._listeners: List[Callable[[], None]] = []
+        self._scheduled = False
+        # The latest energy totals of each member by entry ID, until it is removed
+        self._energy: dict[str, dict[str, float]] = {}
+        # The latest totals by fleet sensor key. None when unavailable.
+        self.totals: dict[str, float | None] = {}
+        self.members = 0
+        self.members_available = 0
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        unsubscribe_changed = async_dispatcher_connect(
+            self._hass, SIGNAL_MEMBERS_CHANGED, self._async_rebuild_members
+        )
+        unsubscribe_removed = async_dispatcher_connect(
+            self._hass, SIGNAL_MEMBER_REMOVED, self._async_remove_member
+        )
+        self._async_rebuild_members()
+
+        @callback
+        def stop() -> None:
+            unsubscribe_changed()
+            unsubscribe_removed()
+            for remove in self._members.values():
+                remove()
+            self._members.clear()
+
+        return stop
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    @callback
+    def _async_rebuild_members(self) -> None:
+        contexts = self._member_contexts()
+        for entry_id in list(self._members):
+            if entry_id not in contexts:
+                self._members.pop(entry_id)()
+        for entry_id, context in contexts.items():
+            if entry_id not in self._members:
+                self._members[entry_id] = context.coordinator.async_add_listener(
+                    self._async_schedule_update
+                )
+        self._async_schedule_update()
+
+    @callback
+    def _async_remove_member(self, entry_id: str) -> None:
+        self._energy.pop(entry_id, None)
+        self._async_schedule_update()
+
+    def _member_contexts(self) -> dict[str, Context]:
+        return {
+            entry_id: entry_data[KEY_CONTEXT]
+            for entry_id, entry_data in self._hass.data.get(DOMAIN, {}).items()
+            if KEY_CONTEXT in entry_data and entry_data[KEY_CONTEXT].loaded
+        }
+
+    @callback
+    def _async_schedule_update(self) -> None:
+        if not self._scheduled:
+            self._scheduled = True
+            self._hass.loop.call_soon(self._update)
+
+    def _update(self) -> None:
+        self._scheduled = False
+        contexts = self._member_contexts()
+        power = {key: 0.0 for key in POWER_TOTALS}
+        available = 0
+        for entry_id, context in contexts.items():
+            data = context.controller.data
+            self._energy[entry_id] = dict(data.energy)
+            if (
+                not context.coordinator.last_update_success
+                or data.stale
+                or data.power is None
+            ):
+                continue
+            available += 1
+            for key, field in POWER_TOTALS.items():
+                power[key] += getattr(data.power, field)
+
+        energy: dict[str, float] = {}
+        enabled = {
+            entry.entry_id
+            for entry in self._hass.config_entries.async_entries(DOMAIN)
+            if not is_fleet_entry(entry.data) and entry.disabled_by is None
+        }
+        if enabled <= self._energy.keys():
+            for member_energy in self._energy.values():
+                for key, value in member_energy.items():
+                    energy[key] = energy.get(key, 0.0) + value
+
+        complete = available == len(contexts) or self.partial_totals
+        self.members = len(contexts)
+        self.members_available = available
+        self.totals = {
+            **{
+                key: value if available > 0 and complete else None
+                for key, value in power.items()
+            },
+            **energy,
+        }
+        for listener in list(self._listeners):
+            listener()
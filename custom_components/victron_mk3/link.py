@@ -0,0 +1,97 @@
+"""Serialized, prioritized access to the link to the MK3 interface."""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from enum import IntEnum
+import heapq
+import itertools
+import time
+from typing import AsyncIterator, Callable, List
+from victron_mk3 import Handler, VictronMK3, logger
+
+from .metrics import LinkMetrics
+
+
+class Priority(IntEnum):
+    """The order in which waiters are granted the link. Lower values go first."""
+
+    # Remote panel commands, their read-back, and interface flags
+    COMMAND = 0
+    # Poll cycles run by the coordinator
+    POLL = 1
+    # Samples taken between updates
+    SAMPLE = 2
+
+
+class LinkScheduler:
+    """Grants exclusive use of the interface to one holder at a time.
+
+    When the link is released, it is handed to the waiter with the highest priority,
+    in the order in which they arrived, so a command waits for at most the frame that
+    is in flight rather than for a whole poll cycle or for everything else that was
+    already queued.
+    """
+
+    def __init__(
+        self, mk3_factory: Callable[[], VictronMK3], metrics: LinkMetrics
+    ) -> None:
+        self._mk3_factory = mk3_factory
+        self._mk3: VictronMK3 | None = None
+        self._metrics = metrics
+        self._busy = False
+        self._waiters: List[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+
+    async def start(self, handler: Handler) -> None:
+        self._mk3 = self._mk3_factory()
+        await self._mk3.start(handler)
+
+    async def stop(self) -> None:
+        if self._mk3 is not None:
+            mk3, self._mk3 = self._mk3, None
+            await mk3.stop()
+
+    async def restart(self, handler: Handler) -> None:
+        """Replaces the interface with a new instance once the link is free."""
+        async with self.hold(Priority.COMMAND):
+            try:
+                await self.stop()
+            except Exception:
+                logger.debug("Failed to stop the interface", exc_info=True)
+            await self.start(handler)
+
+    @asynccontextmanager
+    async def hold(self, priority: Priority) -> AsyncIterator[VictronMK3]:
+        """Holds the link for a sequence of requests."""
+        started = time.perf_counter()
+        await self._acquire(priority)
+        self._metrics.record_wait(priority.name.lower(), time.perf_counter() - started)
+        try:
+            yield self._mk3
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: Priority) -> None:
+        if not self._busy:
+            self._busy = True
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The link was handed over just as the waiter was cancelled.
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # Hand the link over without marking it idle so no one can barge in.
+                future.set_result(None)
+                return
+        self._busy = False
@@ -0,0 +1,122 @@
+"""Latency histograms and counters that describe the health of the interface link."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any, List
+
+# Upper bounds of the histogram buckets in seconds. The last bucket is unbounded.
+LATENCY_BUCKETS = (0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+
+class LatencyHistogram:
+    """Counts latencies in fixed buckets so that percentiles are cheap to estimate."""
+
+    def __init__(self) -> None:
+        self.buckets: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.last: float | None = None
+
+    def record(self, seconds: float) -> None:
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+        self.last = seconds
+
+    def percentile(self, percent: float) -> float | None:
+        """Estimates the percentile as the upper bound of the bucket that holds it.
+
+        The estimate is capped at the maximum so that the unbounded bucket and sparse
+        histograms don't overstate the latency.
+        """
+        if self.count == 0:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                if index < len(LATENCY_BUCKETS):
+                    return min(LATENCY_BUCKETS[index], self.maximum)
+                break
+        return self.maximum
+
+    @property
+    def mean(self) -> float | None:
+        return None if self.count == 0 else self.total / self.count
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.maximum,
+            "buckets": {
+                **{
+                    f"le_{bound}": count
+                    for bound, count in zip(LATENCY_BUCKETS, self.buckets)
+                },
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+class LinkMetrics:
+    """Request latencies by request type, error counters, and update cycle durations."""
+
+    def __init__(self) -> None:
+        self.requests: dict[str, LatencyHistogram] = {}
+        # Time spent waiting for the link, by priority
+        self.waits: dict[str, LatencyHistogram] = {}
+        self.updates = LatencyHistogram()
+        # Requests that completed without a response
+        self.timeouts = 0
+        # Communication faults reported by the interface
+        self.faults = 0
+        # Times the interface stopped hearing from the device
+        self.idles = 0
+        # Attempts to reconnect to the interface after a fault
+        self.reconnects = 0
+        # Time from each fault until the interface responded again
+        self.recoveries = LatencyHistogram()
+
+    def record_request(self, request: str, seconds: float) -> None:
+        _record(self.requests, request, seconds)
+
+    def record_wait(self, priority: str, seconds: float) -> None:
+        _record(self.waits, priority, seconds)
+
+    def request_percentile(self, percent: float) -> float | None:
+        """Estimates the percentile of the latency of all requests combined."""
+        combined = LatencyHistogram()
+        for histogram in self.requests.values():
+            combined.buckets = [
+                a + b for a, b in zip(combined.buckets, histogram.buckets)
+            ]
+            combined.count += histogram.count
+            combined.maximum = max(combined.maximum, histogram.maximum)
+        return combined.percentile(percent)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requests": {k: v.as_dict() for k, v in sorted(self.requests.items())},
+            "waits": {k: v.as_dict() for k, v in sorted(self.waits.items())},
+            "updates": self.updates.as_dict(),
+            "timeouts": self.timeouts,
+            "faults": self.faults,
+            "idles": self.idles,
+            "reconnects": self.reconnects,
+            "recoveries": self.recoveries.as_dict(),
+        }
+
+
+def _record(histograms: dict[str, LatencyHistogram], key: str, seconds: float) -> None:
+    histogram = histograms.get(key)
+    if histogram is None:
+        histogram = histograms[key] = LatencyHistogram()
+    histogram.record(seconds)
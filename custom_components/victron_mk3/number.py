@@ -9,13 +9,12 @@ from homeassistant.components.number import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import EntityCategory, UnitOfElectricCurrent
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from typing import Awaitable, Callable
 
-from . import Context, Data
+from . import Context, Data, Section, VictronMK3Entity
 from .const import (
     DOMAIN,
     KEY_CONTEXT,
@@ -29,11 +28,11 @@ async def set_remote_panel_current_limit(context: Context, value: float) -> None
 
     mode = data.remote_panel_mode()
     await context.controller.set_remote_panel_state(mode, value)
-    await context.coordinator.async_request_refresh()
 
 
 @dataclass(kw_only=True)
 class VictronMK3NumberEntityDescription(NumberEntityDescription):
+    sections: tuple[Section, ...]
     range_fn: Callable[[Data], tuple[float, float, float, float]]
     set_fn: Callable[[Context, float], Awaitable[None]]
 
@@ -46,49 +45,42 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3NumberEntityDescription, ...] = (
         native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
         entity_category=EntityCategory.CONFIG,
         mode=NumberMode.BOX,
+        sections=(Section.CONFIG,),
         range_fn=lambda data: None
         if data.config is None
         else (
             data.config.minimum_current_limit,
             data.config.maximum_current_limit,
             0.1,
-            data.config.actual_current_limit,
+            data.remote_panel_current_limit(),
         ),
         set_fn=set_remote_panel_current_limit,
     ),
 )
 
 
-class VictronMK3NumberEntity(CoordinatorEntity, NumberEntity):
-    _attr_has_entity_name = True
+class VictronMK3NumberEntity(VictronMK3Entity, NumberEntity):
+    entity_description: VictronMK3NumberEntityDescription
 
     def __init__(
         self, context: Context, entity_description: VictronMK3NumberEntityDescription
     ):
-        CoordinatorEntity.__init__(self, context.coordinator, entity_description.key)
-        self.context = context
-        self.entity_description = entity_description
-        self._attr_device_info = context.device_info
-        self._attr_unique_id = f"{context.device_id}-{entity_description.key}"
-        self._attr_available = False
+        VictronMK3Entity.__init__(
+            self, context, entity_description, context.make_write_filter()
+        )
         self._attr_native_min_value = 0
         self._attr_native_max_value = 0
         self._attr_native_step = None
         self._attr_native_value = None
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        data = self.coordinator.data
-        value = None if data is None else self.entity_description.range_fn(data)
-        if value is None:
-            self._attr_available = False
-        else:
-            self._attr_available = True
-            self._attr_native_min_value = value[0]
-            self._attr_native_max_value = value[1]
-            self._attr_native_step = value[2]
-            self._attr_native_value = value[3]
-        self.async_write_ha_state()
+    def _read_value(self, data: Data) -> tuple[float, float, float, float] | None:
+        return self.entity_description.range_fn(data)
+
+    def _apply_value(self, value: tuple[float, float, float, float]) -> None:
+        self._attr_native_min_value = value[0]
+        self._attr_native_max_value = value[1]
+        self._attr_native_step = value[2]
+        self._attr_native_value = value[3]
 
     async def async_set_native_value(self, value: float) -> None:
         await self.entity_description.set_fn(self.context, value)
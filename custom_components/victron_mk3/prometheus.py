@@ -0,0 +1,171 @@
+"""Serves the latest responses and link metrics of each interface to Prometheus."""
+
+from __future__ import annotations
+
+from aiohttp import web
+from enum import Enum
+from homeassistant.components.http import KEY_HASS, HomeAssistantView
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from typing import Any, Iterable, List
+
+from . import Context, Section
+from .const import CONF_METRICS_ENDPOINT, DOMAIN, KEY_CONTEXT
+from .metrics import LATENCY_BUCKETS, LatencyHistogram
+
+METRICS_URL = f"/api/{DOMAIN}/metrics"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Kept apart from the data of the entries, which is keyed by entry ID
+_KEY_VIEW_REGISTERED = f"{DOMAIN}_metrics_view"
+
+
+@callback
+def async_register_view(hass: HomeAssistant) -> None:
+    """Registers the view once. It serves every entry that enables the endpoint."""
+    if hass.data.get(_KEY_VIEW_REGISTERED):
+        return
+    hass.http.register_view(VictronMK3MetricsView)
+    hass.data[_KEY_VIEW_REGISTERED] = True
+
+
+class VictronMK3MetricsView(HomeAssistantView):
+    """Renders the metrics in the Prometheus text exposition format."""
+
+    url = METRICS_URL
+    name = f"api:{DOMAIN}:metrics"
+
+    async def get(self, request: web.Request) -> web.Response:
+        hass = request.app[KEY_HASS]
+        exposition = _Exposition()
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            if not entry.options.get(CONF_METRICS_ENDPOINT, False):
+                continue
+            entry_data = hass.data[DOMAIN].get(entry.entry_id, {})
+            if KEY_CONTEXT in entry_data:
+                _render_entry(exposition, entry, entry_data[KEY_CONTEXT])
+        return web.Response(
+            body=exposition.render().encode(), headers={"Content-Type": CONTENT_TYPE}
+        )
+
+
+class _Exposition:
+    """Groups the samples by metric so that each metric family is written once."""
+
+    def __init__(self) -> None:
+        self._families: dict[str, tuple[str, List[str]]] = {}
+
+    def add(
+        self,
+        name: str,
+        kind: str,
+        labels: dict[str, str],
+        value: float | None,
+        suffix: str = "",
+    ) -> None:
+        if value is None:
+            return
+        label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+        family = self._families.setdefault(name, (kind, []))
+        family[1].append(f"{name}{suffix}{{{label_text}}} {_format(value)}")
+
+    def add_histogram(
+        self, name: str, labels: dict[str, str], histogram: LatencyHistogram
+    ) -> None:
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, histogram.buckets):
+            cumulative += count
+            bucket_labels = {**labels, "le": str(bound)}
+            self.add(name, "histogram", bucket_labels, cumulative, "_bucket")
+        bucket_labels = {**labels, "le": "+Inf"}
+        self.add(name, "histogram", bucket_labels, histogram.count, "_bucket")
+        self.add(name, "histogram", labels, histogram.total, "_sum")
+        self.add(name, "histogram", labels, histogram.count, "_count")
+
+    def render(self) -> str:
+        lines = []
+        for name, (kind, samples) in self._families.items():
+            lines.append(f"# TYPE {name} {kind}")
+            lines += samples
+        return "\n".join(lines) + "\n"
+
+
+def _render_entry(
+    exposition: _Exposition, entry: ConfigEntry, context: Context
+) -> None:
+    labels = {"entry_id": entry.entry_id, "entry": entry.title}
+    controller = context.controller
+    data = controller.data
+
+    exposition.add(
+        f"{DOMAIN}_up",
+        "gauge",
+        labels,
+        1 if context.coordinator.last_update_success else 0,
+    )
+    exposition.add(
+        f"{DOMAIN}_sleeping", "gauge", labels, 1 if controller.sleeping else 0
+    )
+    exposition.add(f"{DOMAIN}_stale", "gauge", labels, 1 if data.stale else 0)
+
+    # Every numeric field of the responses, named after the section and the field.
+    for section in Section:
+        response = data.get(section)
+        if response is None:
+            continue
+        phase = section.phase
+        if phase is None:
+            prefix, section_labels = section.value, labels
+        else:
+            prefix, section_labels = "ac", {**labels, "phase": str(phase)}
+        for field, value in _numeric_fields(vars(response).items()):
+            name = f"{DOMAIN}_{prefix}_{field}"
+            exposition.add(name, "gauge", section_labels, value)
+
+    for key, value in data.energy.items():
+        exposition.add(f"{DOMAIN}_{key}_kwh_total", "counter", labels, value)
+
+    metrics = controller.metrics
+    for request, histogram in sorted(metrics.requests.items()):
+        exposition.add_histogram(
+            f"{DOMAIN}_request_duration_seconds",
+            {**labels, "request": request},
+            histogram,
+        )
+    for priority, histogram in sorted(metrics.waits.items()):
+        exposition.add_histogram(
+            f"{DOMAIN}_link_wait_seconds", {**labels, "priority": priority}, histogram
+        )
+    exposition.add_histogram(
+        f"{DOMAIN}_update_duration_seconds", labels, metrics.updates
+    )
+    exposition.add_histogram(
+        f"{DOMAIN}_recovery_duration_seconds", labels, metrics.recoveries
+    )
+    for counter in ("timeouts", "faults", "idles", "reconnects"):
+        exposition.add(
+            f"{DOMAIN}_{counter}_total", "counter", labels, getattr(metrics, counter)
+        )
+
+
+def _numeric_fields(fields: Iterable[tuple[str, Any]]) -> Iterable[tuple[str, float]]:
+    for field, value in fields:
+        if field.startswith("_"):
+            continue
+        if isinstance(value, Enum):
+            value = value.value
+        if isinstance(value, bool):
+            yield field, int(value)
+        elif isinstance(value, (int, float)):
+            yield field, value
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
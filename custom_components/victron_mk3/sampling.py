@@ -0,0 +1,57 @@
+"""Buffers for responses that are sampled faster than the coordinator updates."""
+
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+
+
+@dataclass
+class Aggregate:
+    minimum: float
+    maximum: float
+    mean: float
+    last: float
+    count: int
+
+
+class RingBuffer:
+    """A fixed-capacity buffer of timestamped samples backed by arrays of doubles."""
+
+    def __init__(self, capacity: int) -> None:
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._capacity = capacity
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, value: float) -> None:
+        self._times[self._next] = timestamp
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self._capacity
+        self._count = min(self._count + 1, self._capacity)
+
+    def aggregate(self, since: float) -> Aggregate | None:
+        """Summarizes the samples taken after the given time, or None if there are none."""
+        index = self._next
+        count = 0
+        total = 0.0
+        minimum = maximum = last = 0.0
+        for _ in range(self._count):
+            index = (index - 1) % self._capacity
+            if self._times[index] <= since:
+                break
+            value = self._values[index]
+            if count == 0:
+                minimum = maximum = last = value
+            else:
+                minimum = min(minimum, value)
+                maximum = max(maximum, value)
+            total += value
+            count += 1
+        if count == 0:
+            return None
+        return Aggregate(minimum, maximum, total / count, last, count)
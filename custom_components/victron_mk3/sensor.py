@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorDeviceClass,
     SensorEntity,
     SensorEntityDescription,
@@ -13,36 +14,76 @@ from homeassistant.const import (
     UnitOfElectricCurrent,
     UnitOfFrequency,
     UnitOfElectricPotential,
+    UnitOfEnergy,
     UnitOfPower,
+    UnitOfTime,
 )
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.typing import StateType
-from typing import Callable
+from homeassistant.util import dt as dt_util
+from typing import Any, Callable
 from victron_mk3 import DeviceState
 
-from . import Context, Data, Mode, enum_options, enum_value
+from . import (
+    ENERGY_FIELDS,
+    Context,
+    Data,
+    Mode,
+    Section,
+    StateWriteFilter,
+    VictronMK3Entity,
+    enum_options,
+    enum_value,
+)
 from .const import (
-    AC_PHASES_POLLED,
+    CONF_AC_PHASES,
+    CONF_CURRENT_DEADBAND,
+    CONF_ENERGY_DEADBAND,
+    CONF_EXTERNAL_STATISTICS,
+    CONF_FREQUENCY_DEADBAND,
+    CONF_POWER_DEADBAND,
+    CONF_VOLTAGE_DEADBAND,
+    DEFAULT_AC_PHASES,
+    DEFAULT_DEADBANDS,
+    DEFAULT_HEARTBEAT_INTERVAL,
     DOMAIN,
     KEY_CONTEXT,
+    KEY_FLEET,
+    MAX_AC_PHASES,
+    STATISTICS_DEADBAND_FACTOR,
+    STATISTICS_HEARTBEAT_INTERVAL,
 )
+from .external_statistics import StatisticSource, StatisticsCompiler
+from .fleet import POWER_TOTALS, FleetAggregator, is_fleet_entry
+
+DEADBAND_OPTIONS = {
+    SensorDeviceClass.CURRENT: CONF_CURRENT_DEADBAND,
+    SensorDeviceClass.ENERGY: CONF_ENERGY_DEADBAND,
+    SensorDeviceClass.FREQUENCY: CONF_FREQUENCY_DEADBAND,
+    SensorDeviceClass.POWER: CONF_POWER_DEADBAND,
+    SensorDeviceClass.VOLTAGE: CONF_VOLTAGE_DEADBAND,
+}
 
 
 @dataclass(kw_only=True)
 class VictronMK3SensorEntityDescription(SensorEntityDescription):
+    sections: tuple[Section, ...]
     value_fn: Callable[[Data], StateType]
 
 
-def make_ac_phase_sensors(phase: int) -> tuple[VictronMK3SensorEntityDescription, ...]:
+def make_ac_phase_sensors(
+    phase: int, enable_default: bool
+) -> tuple[VictronMK3SensorEntityDescription, ...]:
     index = phase - 1
-    enable_default = phase == 1
     key_suffix = "" if phase == 1 else f"_l{phase}"
     name_suffix = "" if phase == 1 else f" L{phase}"
     return (
         VictronMK3SensorEntityDescription(
             key=f"ac_input_voltage{key_suffix}",
+            sections=(Section.ac(phase),),
             name=f"AC Input Voltage{name_suffix}",
             device_class=SensorDeviceClass.VOLTAGE,
             state_class=SensorStateClass.MEASUREMENT,
@@ -54,6 +95,7 @@ def make_ac_phase_sensors(phase: int) -> tuple[VictronMK3SensorEntityDescription
         ),
         VictronMK3SensorEntityDescription(
             key=f"ac_input_current{key_suffix}",
+            sections=(Section.ac(phase),),
             name=f"AC Input Current{name_suffix}",
             device_class=SensorDeviceClass.CURRENT,
             state_class=SensorStateClass.MEASUREMENT,
@@ -65,6 +107,7 @@ def make_ac_phase_sensors(phase: int) -> tuple[VictronMK3SensorEntityDescription
         ),
         VictronMK3SensorEntityDescription(
             key=f"ac_output_voltage{key_suffix}",
+            sections=(Section.ac(phase),),
             name=f"AC Output Voltage{name_suffix}",
             device_class=SensorDeviceClass.VOLTAGE,
             state_class=SensorStateClass.MEASUREMENT,
@@ -76,6 +119,7 @@ def make_ac_phase_sensors(phase: int) -> tuple[VictronMK3SensorEntityDescription
         ),
         VictronMK3SensorEntityDescription(
             key=f"ac_output_current{key_suffix}",
+            sections=(Section.ac(phase),),
             name=f"AC Output Current{name_suffix}",
             device_class=SensorDeviceClass.CURRENT,
             state_class=SensorStateClass.MEASUREMENT,
@@ -91,6 +135,7 @@ def make_ac_phase_sensors(phase: int) -> tuple[VictronMK3SensorEntityDescription
 ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     VictronMK3SensorEntityDescription(
         key="ac_input_current_limit",
+        sections=(Section.CONFIG,),
         name="AC Input Current Limit",
         device_class=SensorDeviceClass.CURRENT,
         state_class=SensorStateClass.MEASUREMENT,
@@ -102,6 +147,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="ac_input_current_limit_maximum",
+        sections=(Section.CONFIG,),
         name="AC Input Current Limit Maximum",
         device_class=SensorDeviceClass.CURRENT,
         state_class=SensorStateClass.MEASUREMENT,
@@ -113,6 +159,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="ac_input_current_limit_minimum",
+        sections=(Section.CONFIG,),
         name="AC Input Current Limit Minimum",
         device_class=SensorDeviceClass.CURRENT,
         state_class=SensorStateClass.MEASUREMENT,
@@ -124,6 +171,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="ac_input_power",
+        sections=(Section.POWER,),
         name="AC Input Power",
         device_class=SensorDeviceClass.POWER,
         state_class=SensorStateClass.MEASUREMENT,
@@ -132,6 +180,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="ac_input_frequency",
+        sections=(Section.AC_L1,),
         name="AC Input Frequency",
         device_class=SensorDeviceClass.FREQUENCY,
         state_class=SensorStateClass.MEASUREMENT,
@@ -142,6 +191,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="ac_output_power",
+        sections=(Section.POWER,),
         name="AC Output Power",
         device_class=SensorDeviceClass.POWER,
         state_class=SensorStateClass.MEASUREMENT,
@@ -152,6 +202,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="ac_output_frequency",
+        sections=(Section.DC,),
         name="AC Output Frequency",
         device_class=SensorDeviceClass.FREQUENCY,
         state_class=SensorStateClass.MEASUREMENT,
@@ -162,6 +213,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="battery_voltage",
+        sections=(Section.DC,),
         name="Battery Voltage",
         device_class=SensorDeviceClass.VOLTAGE,
         state_class=SensorStateClass.MEASUREMENT,
@@ -170,6 +222,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="battery_power",
+        sections=(Section.POWER,),
         name="Battery Power",
         device_class=SensorDeviceClass.POWER,
         state_class=SensorStateClass.MEASUREMENT,
@@ -178,6 +231,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="battery_charger_current",
+        sections=(Section.DC,),
         name="Battery Charger Current",
         device_class=SensorDeviceClass.CURRENT,
         state_class=SensorStateClass.MEASUREMENT,
@@ -188,6 +242,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="battery_inverter_current",
+        sections=(Section.DC,),
         name="Battery Inverter Current",
         device_class=SensorDeviceClass.CURRENT,
         state_class=SensorStateClass.MEASUREMENT,
@@ -198,6 +253,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="device_state",
+        sections=(Section.AC_L1,),
         name="Device State",
         device_class=SensorDeviceClass.ENUM,
         options=enum_options(DeviceState),
@@ -208,6 +264,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="firmware_version",
+        sections=(Section.VERSION,),
         name="Firmware Version",
         state_class=SensorStateClass.MEASUREMENT,
         entity_category=EntityCategory.DIAGNOSTIC,
@@ -215,6 +272,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="lit_indicators",
+        sections=(Section.LED,),
         name="Lit Indicators",
         device_class=SensorDeviceClass.ENUM,
         entity_category=EntityCategory.DIAGNOSTIC,
@@ -222,6 +280,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="blinking_indicators",
+        sections=(Section.LED,),
         name="Blinking Indicators",
         device_class=SensorDeviceClass.ENUM,
         entity_category=EntityCategory.DIAGNOSTIC,
@@ -229,6 +288,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="front_panel_mode",
+        sections=(Section.CONFIG,),
         name="Front Panel Mode",
         device_class=SensorDeviceClass.ENUM,
         options=enum_options(Mode),
@@ -237,6 +297,7 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
     ),
     VictronMK3SensorEntityDescription(
         key="actual_mode",
+        sections=(Section.CONFIG,),
         name="Actual Mode",
         device_class=SensorDeviceClass.ENUM,
         options=enum_options(Mode),
@@ -246,29 +307,207 @@ ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
 )
 
 
-class VictronMK3SensorEntity(CoordinatorEntity, SensorEntity):
-    _attr_has_entity_name = True
+def make_energy_sensor(key: str, name: str) -> VictronMK3SensorEntityDescription:
+    return VictronMK3SensorEntityDescription(
+        key=key,
+        name=name,
+        sections=(Section.POWER,),
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=3,
+        value_fn=lambda data: data.energy[key],
+    )
+
+
+ENERGY_ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
+    make_energy_sensor("ac_input_energy", "AC Input Energy"),
+    make_energy_sensor("ac_output_energy", "AC Output Energy"),
+    make_energy_sensor("battery_charge_energy", "Battery Charge Energy"),
+    make_energy_sensor("battery_discharge_energy", "Battery Discharge Energy"),
+)
+
+
+# Totals of the fleet entry, described like the sensors of each interface
+FLEET_ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = tuple(
+    x
+    for x in ENTITY_DESCRIPTIONS + ENERGY_ENTITY_DESCRIPTIONS
+    if x.key in POWER_TOTALS or x.key in ENERGY_FIELDS
+)
+
+
+def milliseconds(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def make_counter_sensor(
+    key: str, name: str, value_fn: Callable[[Data], int]
+) -> VictronMK3SensorEntityDescription:
+    return VictronMK3SensorEntityDescription(
+        key=key,
+        name=name,
+        sections=(),
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=value_fn,
+    )
+
+
+# Health of the link to the interface. These are disabled by default.
+LINK_ENTITY_DESCRIPTIONS: tuple[VictronMK3SensorEntityDescription, ...] = (
+    VictronMK3SensorEntityDescription(
+        key="update_duration",
+        name="Update Duration",
+        sections=(),
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda data: milliseconds(data.metrics.updates.last),
+    ),
+    VictronMK3SensorEntityDescription(
+        key="request_latency_p90",
+        name="Request Latency P90",
+        sections=(),
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda data: milliseconds(data.metrics.request_percentile(90)),
+    ),
+    make_counter_sensor(
+        "request_timeouts", "Request Timeouts", lambda data: data.metrics.timeouts
+    ),
+    make_counter_sensor(
+        "communication_faults",
+        "Communication Faults",
+        lambda data: data.metrics.faults,
+    ),
+    make_counter_sensor("idle_events", "Idle Events", lambda data: data.metrics.idles),
+    make_counter_sensor(
+        "reconnects", "Reconnects", lambda data: data.metrics.reconnects
+    ),
+    VictronMK3SensorEntityDescription(
+        key="recovery_time",
+        name="Recovery Time",
+        sections=(),
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda data: data.metrics.recoveries.last,
+    ),
+)
+
+
+class VictronMK3SensorEntity(VictronMK3Entity, SensorEntity):
+    entity_description: VictronMK3SensorEntityDescription
 
     def __init__(
         self, context: Context, entity_description: VictronMK3SensorEntityDescription
     ):
-        CoordinatorEntity.__init__(self, context.coordinator, entity_description.key)
+        VictronMK3Entity.__init__(
+            self,
+            context,
+            entity_description,
+            context.make_write_filter(
+                DEADBAND_OPTIONS.get(entity_description.device_class)
+            ),
+        )
+        self._attr_native_value = None
+
+    def _read_value(self, data: Data) -> StateType:
+        return self.entity_description.value_fn(data)
+
+    def _apply_value(self, value: StateType) -> None:
+        self._attr_native_value = value
+
+    def coarsen_write_filter(self) -> None:
+        """Writes fewer states because the statistics are compiled from the responses."""
+        write_filter = self._write_filter
+        if write_filter.deadband is not None:
+            write_filter.deadband *= STATISTICS_DEADBAND_FACTOR
+        write_filter.heartbeat_interval = max(
+            write_filter.heartbeat_interval, STATISTICS_HEARTBEAT_INTERVAL
+        )
+
+    def _extra_attributes(self, data: Data | None) -> dict[str, Any]:
+        # Publish the range of the samples taken since the previous update, if any.
+        aggregate = (
+            None if data is None else data.aggregates.get(self.entity_description.key)
+        )
+        if aggregate is None:
+            return {}
+        return {
+            "minimum": aggregate.minimum,
+            "maximum": aggregate.maximum,
+            "mean": round(aggregate.mean, 3),
+        }
+
+
+class VictronMK3EnergySensorEntity(VictronMK3SensorEntity, RestoreSensor):
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # The controller integrates energy from zero each time it starts so add the
+        # total from before the restart.
+        last = await self.async_get_last_sensor_data()
+        if last is not None and isinstance(last.native_value, (int, float)):
+            self.context.controller.restore_energy(
+                self.entity_description.key, float(last.native_value)
+            )
+
+
+class VictronMK3FleetSensorEntity(SensorEntity):
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(
+        self,
+        entry: ConfigEntry,
+        aggregator: FleetAggregator,
+        entity_description: VictronMK3SensorEntityDescription,
+    ):
+        self.aggregator = aggregator
         self.entity_description = entity_description
-        self._attr_device_info = context.device_info
-        self._attr_unique_id = f"{context.device_id}-{entity_description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            name=entry.title,
+            manufacturer="Victron Energy",
+            model="Fleet",
+            entry_type=DeviceEntryType.SERVICE,
+        )
+        self._attr_unique_id = f"{entry.entry_id}-{entity_description.key}"
         self._attr_available = False
-        self._attr_native_value = None
+        deadband_option = DEADBAND_OPTIONS.get(entity_description.device_class)
+        self._write_filter = StateWriteFilter(
+            None if deadband_option is None else DEFAULT_DEADBANDS[deadband_option],
+            DEFAULT_HEARTBEAT_INTERVAL,
+        )
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self.aggregator.async_add_listener(self._handle_update))
+        self._handle_update()
 
     @callback
-    def _handle_coordinator_update(self) -> None:
-        data = self.coordinator.data
-        value = None if data is None else self.entity_description.value_fn(data)
-        if value is None:
-            self._attr_available = False
-        else:
-            self._attr_available = True
+    def _handle_update(self) -> None:
+        value = self.aggregator.totals.get(self.entity_description.key)
+        self._attr_available = value is not None
+        if value is not None:
             self._attr_native_value = value
-        self.async_write_ha_state()
+        self._attr_extra_state_attributes = {
+            "members": self.aggregator.members,
+            "members_available": self.aggregator.members_available,
+        }
+        # Membership counts are always significant, unlike changes within the deadband.
+        membership = f"{self.aggregator.members_available}/{self.aggregator.members}"
+        state = (value, membership)
+        if self._write_filter.should_write(state if self.available else None):
+            self.async_write_ha_state()
 
 
 async def async_setup_entry(
@@ -276,16 +515,97 @@ async def async_setup_entry(
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
+    if is_fleet_entry(entry.data):
+        aggregator = hass.data[DOMAIN][entry.entry_id][KEY_FLEET]
+        async_add_entities(
+            VictronMK3FleetSensorEntity(entry, aggregator, description)
+            for description in FLEET_ENTITY_DESCRIPTIONS
+        )
+        return
+
     context = hass.data[DOMAIN][entry.entry_id][KEY_CONTEXT]
     entities = [
         VictronMK3SensorEntity(context, description)
         for description in ENTITY_DESCRIPTIONS
     ]
-    for phase in range(1, AC_PHASES_POLLED + 1):
-        ac_sensors = [
+    entities += [
+        VictronMK3EnergySensorEntity(context, description)
+        for description in ENERGY_ENTITY_DESCRIPTIONS
+    ]
+    entities += [
+        VictronMK3SensorEntity(context, description)
+        for description in LINK_ENTITY_DESCRIPTIONS
+    ]
+    # Enable the sensors for every phase that was detected. Until detection succeeds,
+    # only the first phase is enabled by default.
+    ac_phases = entry.data.get(CONF_AC_PHASES)
+    for phase in ac_phases or DEFAULT_AC_PHASES:
+        entities += [
             VictronMK3SensorEntity(context, description)
-            for description in make_ac_phase_sensors(phase)
+            for description in make_ac_phase_sensors(
+                phase, ac_phases is not None or phase == 1
+            )
         ]
-        context.controller.ac_entities[phase - 1] += ac_sensors
-        entities += ac_sensors
+    if ac_phases is not None:
+        # Remove the sensors of phases that were not detected.
+        registry = entity_registry.async_get(hass)
+        for phase in range(1, MAX_AC_PHASES + 1):
+            if phase in ac_phases:
+                continue
+            for description in make_ac_phase_sensors(phase, False):
+                entity_id = registry.async_get_entity_id(
+                    "sensor", DOMAIN, f"{context.device_id}-{description.key}"
+                )
+                if entity_id is not None:
+                    registry.async_remove(entity_id)
+    if entry.options.get(CONF_EXTERNAL_STATISTICS, False):
+        _async_setup_external_statistics(hass, entry, context, entities)
     async_add_entities(entities)
+
+
+def _async_setup_external_statistics(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    context: Context,
+    entities: list[VictronMK3SensorEntity],
+) -> None:
+    """Compile the statistics of the primary measurements instead of the recorder.
+
+    The energy totals keep their state class so that the recorder compiles their sums
+    and they can be used in the Energy dashboard.
+    """
+    sources = []
+    for entity in entities:
+        description = entity.entity_description
+        if (
+            description.entity_category is not None
+            or description.state_class != SensorStateClass.MEASUREMENT
+        ):
+            continue
+        sources.append(
+            StatisticSource(
+                key=description.key,
+                name=description.name,
+                unit_of_measurement=description.native_unit_of_measurement,
+                value_fn=description.value_fn,
+            )
+        )
+        # Without a state class, the recorder doesn't compile statistics from the
+        # states so that they aren't recorded twice.
+        entity.entity_description = replace(description, state_class=None)
+        entity.coarsen_write_filter()
+
+    compiler = StatisticsCompiler(hass, entry.entry_id.lower(), entry.title, sources)
+    entry.async_on_unload(compiler.async_start())
+
+    @callback
+    def _async_add_statistics() -> None:
+        data = context.coordinator.data
+        if (
+            context.coordinator.last_update_success
+            and data is not None
+            and not data.stale
+        ):
+            compiler.add(dt_util.utcnow(), data)
+
+    entry.async_on_unload(context.coordinator.async_add_listener(_async_add_statistics))
@@ -0,0 +1,69 @@
+"""Persists the last responses received from the interface for a warm start."""
+
+from __future__ import annotations
+
+from enum import Enum
+from typing import Any, Mapping
+import victron_mk3
+from victron_mk3 import Response, logger
+
+STORAGE_VERSION = 1
+
+# Seconds between writes of the snapshot. A write stays pending in the meantime so the
+# latest snapshot is also written when Home Assistant stops, and it is written when the
+# entry is unloaded.
+SAVE_INTERVAL = 300
+
+_TYPE_KEY = "__type__"
+_ENUM_KEY = "__enum__"
+
+
+def encode_responses(responses: Mapping[str, Response | None]) -> dict[str, Any]:
+    """Encodes responses as JSON-compatible dicts of their attributes.
+
+    Enums are stored by type and value so that they can be decoded without knowing the
+    layout of each response type.
+    """
+    encoded = {}
+    for key, response in responses.items():
+        if response is None:
+            continue
+        try:
+            encoded[key] = {
+                _TYPE_KEY: type(response).__name__,
+                **{k: _encode_value(v) for k, v in vars(response).items()},
+            }
+        except TypeError:
+            logger.debug(f"Cannot store {key} response", exc_info=True)
+    return encoded
+
+
+def decode_responses(encoded: Mapping[str, Any]) -> dict[str, Response]:
+    """Decodes the responses, skipping any that the library can no longer hold."""
+    decoded = {}
+    for key, fields in encoded.items():
+        try:
+            response_type = getattr(victron_mk3, fields[_TYPE_KEY])
+            response = response_type.__new__(response_type)
+            response.__dict__.update(
+                {k: _decode_value(v) for k, v in fields.items() if k != _TYPE_KEY}
+            )
+        except (AttributeError, KeyError, TypeError, ValueError):
+            logger.debug(f"Discarding stored {key} response", exc_info=True)
+            continue
+        decoded[key] = response
+    return decoded
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return {_ENUM_KEY: type(value).__name__, "value": value.value}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and _ENUM_KEY in value:
+        return getattr(victron_mk3, value[_ENUM_KEY])(value["value"])
+    return value
@@ -0,0 +1,137 @@
+"""Runs the serial I/O for an interface on a dedicated thread with its own event loop."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import threading
+from typing import Awaitable, Callable, TypeVar
+from victron_mk3 import Fault, Handler, Response, VictronMK3
+
+T = TypeVar("T")
+
+
+class ThreadedMK3:
+    """Stands in for VictronMK3 and forwards requests to an instance on an I/O thread.
+
+    The serial port is read, written, and decoded on the I/O thread so its timing is
+    unaffected by the load on the main event loop. Handler callbacks are queued and
+    delivered to the main loop in batches, in the order in which they occurred.
+    """
+
+    def __init__(
+        self, port: str, mk3_factory: Callable[[str], VictronMK3] = VictronMK3
+    ) -> None:
+        self._port = port
+        self._mk3_factory = mk3_factory
+        self._mk3: VictronMK3 | None = None
+        self._handler: Handler | None = None
+        self._main_loop: asyncio.AbstractEventLoop | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._events: deque[Callable[[Handler], None]] = deque()
+        self._events_lock = threading.Lock()
+
+    async def start(self, handler: Handler) -> None:
+        self._handler = handler
+        self._main_loop = asyncio.get_running_loop()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name=f"victron_mk3 {self._port}", daemon=True
+        )
+        self._thread.start()
+
+        async def start_mk3() -> None:
+            self._mk3 = self._mk3_factory(self._port)
+            await self._mk3.start(_ForwardingHandler(self))
+
+        await self._run(start_mk3())
+
+    async def stop(self) -> None:
+        if self._thread is None:
+            return
+        mk3 = self._mk3
+
+        async def stop_mk3() -> None:
+            try:
+                if mk3 is not None:
+                    await mk3.stop()
+            finally:
+                # Let cancelled requests finish before the loop is stopped.
+                tasks = asyncio.all_tasks() - {asyncio.current_task()}
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            await self._run(stop_mk3())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            await self._main_loop.run_in_executor(None, self._thread.join)
+            self._loop.close()
+            self._thread = None
+            self._mk3 = None
+
+    def send_led_request(self) -> Awaitable[Response | None]:
+        return self._call(lambda mk3: mk3.send_led_request())
+
+    def send_dc_request(self) -> Awaitable[Response | None]:
+        return self._call(lambda mk3: mk3.send_dc_request())
+
+    def send_ac_request(self, phase: int) -> Awaitable[Response | None]:
+        return self._call(lambda mk3: mk3.send_ac_request(phase))
+
+    def send_power_request(self) -> Awaitable[Response | None]:
+        return self._call(lambda mk3: mk3.send_power_request())
+
+    def send_config_request(self) -> Awaitable[Response | None]:
+        return self._call(lambda mk3: mk3.send_config_request())
+
+    def send_state_request(self, switch_state, current_limit) -> Awaitable[None]:
+        return self._call(
+            lambda mk3: mk3.send_state_request(switch_state, current_limit)
+        )
+
+    def send_interface_request(self, flags) -> Awaitable[None]:
+        return self._call(lambda mk3: mk3.send_interface_request(flags))
+
+    def _call(self, request: Callable[[VictronMK3], Awaitable[T]]) -> Awaitable[T]:
+        async def run() -> T:
+            return await request(self._mk3)
+
+        return self._run(run())
+
+    def _run(self, coro: Awaitable[T]) -> Awaitable[T]:
+        # Cancelling the returned future also cancels the request on the I/O thread.
+        return asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(coro, self._loop), loop=self._main_loop
+        )
+
+    def _post(self, event: Callable[[Handler], None]) -> None:
+        """Queues a handler callback from the I/O thread."""
+        with self._events_lock:
+            self._events.append(event)
+            if len(self._events) > 1:
+                return  # A flush is already scheduled
+        self._main_loop.call_soon_threadsafe(self._flush)
+
+    def _flush(self) -> None:
+        with self._events_lock:
+            events = self._events
+            self._events = deque()
+        for event in events:
+            event(self._handler)
+
+
+class _ForwardingHandler(Handler):
+    def __init__(self, owner: ThreadedMK3) -> None:
+        self._owner = owner
+
+    def on_response(self, response: Response) -> None:
+        self._owner._post(lambda handler: handler.on_response(response))
+
+    def on_idle(self) -> None:
+        self._owner._post(lambda handler: handler.on_idle())
+
+    def on_fault(self, fault: Fault) -> None:
+        self._owner._post(lambda handler: handler.on_fault(fault))
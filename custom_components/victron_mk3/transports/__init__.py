@@ -0,0 +1,148 @@
+"""Serial port URL handlers for capturing and replaying MK3 traffic.
+
+Importing this package registers the following URL schemes with pyserial so that
+they can be used wherever the integration accepts a serial port:
+
+- mk3capture://<port>?path=<file>[&max_bytes=<n>][&backups=<n>] opens the serial
+  port and records all of the traffic that passes through it to a capture file.
+- mk3replay://<file>[?speed=<factor>][&repeat=1] replays the traffic received in a
+  capture file. A speed of 1 replays at the recorded pace and a speed of 0 (the
+  default) replays as fast as the integration sends its requests.
+
+A capture file starts with CAPTURE_MAGIC followed by a sequence of records. Each
+record has a RECORD_HEADER holding the wall clock time, the direction, and the
+length of the data, followed by the data itself. The data is recorded in the chunks
+in which it was read or written so a chunk may hold part of a frame or several frames.
+"""
+
+from __future__ import annotations
+
+from enum import IntEnum
+import os
+import queue
+import struct
+import threading
+import time
+from typing import BinaryIO, Iterator, NamedTuple
+from urllib.parse import quote, urlencode
+
+import serial
+
+CAPTURE_MAGIC = b"MK3CAP1\n"
+RECORD_HEADER = struct.Struct("<dBH")
+
+SCHEME_CAPTURE = "mk3capture"
+SCHEME_REPLAY = "mk3replay"
+
+DEFAULT_CAPTURE_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_CAPTURE_BACKUPS = 3
+
+if __name__ not in serial.protocol_handler_packages:
+    serial.protocol_handler_packages.append(__name__)
+
+
+class Direction(IntEnum):
+    RX = 0  # From the interface
+    TX = 1  # To the interface
+
+
+class Record(NamedTuple):
+    timestamp: float
+    direction: Direction
+    data: bytes
+
+
+def capture_url(
+    port: str,
+    path: str,
+    max_bytes: int = DEFAULT_CAPTURE_MAX_BYTES,
+    backups: int = DEFAULT_CAPTURE_BACKUPS,
+) -> str:
+    """Returns a URL that opens the port and captures its traffic to a file."""
+    query = urlencode({"path": path, "max_bytes": max_bytes, "backups": backups})
+    return f"{SCHEME_CAPTURE}://{quote(port)}?{query}"
+
+
+def replay_url(path: str, speed: float = 0.0, repeat: bool = False) -> str:
+    """Returns a URL that replays the traffic received in a capture file."""
+    query = urlencode({"speed": speed, "repeat": int(repeat)})
+    return f"{SCHEME_REPLAY}://{quote(path)}?{query}"
+
+
+def read_capture(file: BinaryIO) -> Iterator[Record]:
+    """Reads the records from a capture file, stopping at a truncated record."""
+    if file.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+        raise ValueError("Not an MK3 capture file")
+    while True:
+        header = file.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            return
+        timestamp, direction, length = RECORD_HEADER.unpack(header)
+        data = file.read(length)
+        if len(data) < length:
+            return
+        yield Record(timestamp, Direction(direction), data)
+
+
+class CaptureWriter:
+    """Writes records to a rotating capture file on a background thread.
+
+    The serial port is read and written on the event loop so the file is written
+    elsewhere to keep blocking I/O off the loop. When the file would grow past
+    max_bytes, it is renamed to <path>.1, the older backups are shifted along, and
+    a new file is started.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backups: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue: queue.SimpleQueue[Record | None] = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._run, name=f"mk3capture {path}", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, direction: Direction, data: bytes) -> None:
+        if data:
+            self._queue.put(Record(time.time(), direction, bytes(data)))
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        file = self._open()
+        try:
+            while (record := self._queue.get()) is not None:
+                size = RECORD_HEADER.size + len(record.data)
+                if file.tell() + size > self.max_bytes > len(CAPTURE_MAGIC):
+                    file.close()
+                    self._rotate()
+                    file = self._open()
+                file.write(
+                    RECORD_HEADER.pack(
+                        record.timestamp, record.direction, len(record.data)
+                    )
+                )
+                file.write(record.data)
+                if self._queue.empty():
+                    file.flush()
+        finally:
+            file.close()
+
+    def _open(self) -> BinaryIO:
+        file = open(self.path, "ab")
+        if file.tell() == 0:
+            file.write(CAPTURE_MAGIC)
+        return file
+
+    def _rotate(self) -> None:
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
@@ -0,0 +1,77 @@
+"""The mk3capture:// URL handler which records the traffic of a serial port."""
+
+from __future__ import annotations
+
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import serial
+
+from . import (
+    DEFAULT_CAPTURE_BACKUPS,
+    DEFAULT_CAPTURE_MAX_BYTES,
+    SCHEME_CAPTURE,
+    CaptureWriter,
+    Direction,
+)
+
+
+class Serial(serial.Serial):
+    """A serial port that captures the data it reads and writes."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._capture_path: str | None = None
+        self._capture_max_bytes = DEFAULT_CAPTURE_MAX_BYTES
+        self._capture_backups = DEFAULT_CAPTURE_BACKUPS
+        self._writer: CaptureWriter | None = None
+        super().__init__(*args, **kwargs)
+
+    @serial.Serial.port.setter
+    def port(self, value: str | None) -> None:
+        if value is not None:
+            value = self._from_url(value)
+        serial.Serial.port.__set__(self, value)
+
+    def _from_url(self, url: str) -> str:
+        parts = urlsplit(url)
+        if parts.scheme != SCHEME_CAPTURE:
+            raise serial.SerialException(
+                f"Expected a URL of the form {SCHEME_CAPTURE}://<port>?path=<file>, "
+                f"got {url!r}"
+            )
+        options = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        try:
+            self._capture_path = options["path"]
+            self._capture_max_bytes = int(
+                options.get("max_bytes", DEFAULT_CAPTURE_MAX_BYTES)
+            )
+            self._capture_backups = int(options.get("backups", DEFAULT_CAPTURE_BACKUPS))
+        except (KeyError, ValueError) as e:
+            raise serial.SerialException(f"Invalid capture options in {url!r}") from e
+        return unquote(parts.netloc + parts.path)
+
+    def open(self) -> None:
+        super().open()
+        self._writer = CaptureWriter(
+            self._capture_path, self._capture_max_bytes, self._capture_backups
+        )
+
+    def close(self) -> None:
+        super().close()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def read(self, size: int = 1) -> bytes:
+        data = super().read(size)
+        if self._writer is not None:
+            self._writer.write(Direction.RX, data)
+        return data
+
+    def write(self, data: bytes) -> int | None:
+        written = super().write(data)
+        if self._writer is not None:
+            # Non-blocking writes may only write part of the data.
+            self._writer.write(
+                Direction.TX, data if written is None else data[:written]
+            )
+        return written
@@ -0,0 +1,199 @@
+"""The mk3replay:// URL handler which replays the traffic recorded in a capture file.
+
+The received data is fed through a pipe so that the port has a file descriptor that
+the event loop can watch just like a real serial port. The data written to the port
+is discarded after it has been used to pace the replay.
+"""
+
+from __future__ import annotations
+
+import os
+import select
+import threading
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from serial import PortNotOpenError, SerialBase, SerialException
+
+from . import SCHEME_REPLAY, Direction, Record, read_capture
+
+
+class Serial(SerialBase):
+    """A serial port that replays the data received in a capture file."""
+
+    def open(self) -> None:
+        if self.is_open:
+            raise SerialException("Port is already open.")
+        if self._port is None:
+            raise SerialException("Port must be configured before it can be used.")
+        path, self._speed, self._repeat = self._from_url(self._port)
+        try:
+            with open(path, "rb") as file:
+                self._records = list(read_capture(file))
+        except (OSError, ValueError) as e:
+            raise SerialException(f"Could not read capture {path!r}: {e}") from e
+
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        os.set_blocking(self._write_fd, False)
+        self._written = threading.Semaphore(0)
+        self._closing = threading.Event()
+        self._feeder = threading.Thread(
+            target=self._feed, name=f"mk3replay {path}", daemon=True
+        )
+        self.is_open = True
+        self._feeder.start()
+
+    def _from_url(self, url: str) -> tuple[str, float, bool]:
+        parts = urlsplit(url)
+        if parts.scheme != SCHEME_REPLAY:
+            raise SerialException(
+                f"Expected a URL of the form {SCHEME_REPLAY}://<file>, got {url!r}"
+            )
+        options = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        try:
+            speed = float(options.get("speed", 0))
+            repeat = bool(int(options.get("repeat", 0)))
+        except ValueError as e:
+            raise SerialException(f"Invalid replay options in {url!r}") from e
+        return unquote(parts.netloc + parts.path), speed, repeat
+
+    def _reconfigure_port(self) -> None:
+        pass
+
+    def close(self) -> None:
+        if not self.is_open:
+            return
+        self.is_open = False
+        self._closing.set()
+        self._written.release()
+        self._feeder.join()
+        os.close(self._read_fd)
+        os.close(self._write_fd)
+
+    def fileno(self) -> int:
+        if not self.is_open:
+            raise PortNotOpenError()
+        return self._read_fd
+
+    @property
+    def in_waiting(self) -> int:
+        if not self.is_open:
+            raise PortNotOpenError()
+        readable, _, _ = select.select([self._read_fd], [], [], 0)
+        return 1 if readable else 0
+
+    @property
+    def out_waiting(self) -> int:
+        return 0
+
+    def read(self, size: int = 1) -> bytes:
+        if not self.is_open:
+            raise PortNotOpenError()
+        data = bytearray()
+        deadline = None if self._timeout is None else time.monotonic() + self._timeout
+        while len(data) < size:
+            try:
+                chunk = os.read(self._read_fd, size - len(data))
+            except BlockingIOError:
+                chunk = None
+            if chunk:
+                data += chunk
+                continue
+            if chunk == b"":
+                break  # The feeder closed the pipe
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            select.select([self._read_fd], [], [], remaining)
+        return bytes(data)
+
+    def write(self, data: bytes) -> int:
+        if not self.is_open:
+            raise PortNotOpenError()
+        self._written.release()
+        return len(data)
+
+    def reset_input_buffer(self) -> None:
+        pass
+
+    def reset_output_buffer(self) -> None:
+        pass
+
+    def send_break(self, duration: float = 0.25) -> None:
+        pass
+
+    def _update_break_state(self) -> None:
+        pass
+
+    def _update_rts_state(self) -> None:
+        pass
+
+    def _update_dtr_state(self) -> None:
+        pass
+
+    @property
+    def cts(self) -> bool:
+        return True
+
+    @property
+    def dsr(self) -> bool:
+        return True
+
+    @property
+    def ri(self) -> bool:
+        return False
+
+    @property
+    def cd(self) -> bool:
+        return True
+
+    def _feed(self) -> None:
+        while not self._closing.is_set():
+            if self._speed > 0:
+                self._feed_timed()
+            else:
+                self._feed_paced()
+            if not self._repeat:
+                break
+
+    def _feed_timed(self) -> None:
+        """Replays the received data at the recorded pace scaled by the speed."""
+        if not self._records:
+            return
+        origin = self._records[0].timestamp
+        started = time.monotonic()
+        for record in self._records:
+            if record.direction != Direction.RX:
+                continue
+            delay = (
+                started + (record.timestamp - origin) / self._speed - time.monotonic()
+            )
+            if self._closing.wait(max(0.0, delay)):
+                return
+            self._send(record)
+
+    def _feed_paced(self) -> None:
+        """Replays the received data as fast as the integration sends its requests.
+
+        The data that was received before the next recorded write is released each
+        time the integration writes to the port so that responses follow requests.
+        """
+        for record in self._records:
+            if record.direction == Direction.TX:
+                self._written.acquire()
+                if self._closing.is_set():
+                    return
+            else:
+                self._send(record)
+
+    def _send(self, record: Record) -> None:
+        view = memoryview(record.data)
+        while view and not self._closing.is_set():
+            try:
+                view = view[os.write(self._write_fd, view) :]
+            except BlockingIOError:
+                # Wait for the port to be read without blocking close().
+                select.select([], [self._write_fd], [], 0.1)
+            except OSError:
+                return